@@ -0,0 +1,224 @@
+import atexit
+import functools
+import math
+import random
+import threading
+import time
+from collections.abc import Awaitable, Callable
+from typing import ParamSpec, TypeVar
+
+from loguru import logger
+
+P = ParamSpec("P")  # For function parameters
+R = TypeVar("R")  # For return type
+
+SUB_BUCKET_BITS = 4  # 16 linear sub-buckets per power of two: <= 6.25% error
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+
+
+def _bucket_index(ns: int) -> int:
+    """Map a duration in ns to its log-linear (HDR-style) bucket."""
+    if ns < SUB_BUCKETS:
+        return ns
+    shift = ns.bit_length() - 1 - SUB_BUCKET_BITS
+    return (shift + 1) * SUB_BUCKETS + ((ns >> shift) & (SUB_BUCKETS - 1))
+
+
+def _bucket_value(index: int) -> float:
+    """Return the midpoint in ns of a bucket."""
+    if index < SUB_BUCKETS:
+        return float(index)
+    shift = index // SUB_BUCKETS - 1
+    lower = (SUB_BUCKETS + index % SUB_BUCKETS) << shift
+    return lower + ((1 << shift) - 1) / 2
+
+
+class Histogram:
+    """Duration histogram with log-linear buckets of bounded relative error."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self._buckets: dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, ns: int) -> None:
+        """Record one duration in ns."""
+        index = _bucket_index(ns)
+        with self._lock:
+            self.count += 1
+            self.total_ns += ns
+            if ns > self.max_ns:
+                self.max_ns = ns
+            self._buckets[index] = self._buckets.get(index, 0) + 1
+
+    def percentile(self, q: float) -> float:
+        """Return the q-th percentile (q in [0, 100]) in seconds."""
+        with self._lock:
+            buckets = sorted(self._buckets.items())
+            count = self.count
+        if count == 0:
+            return 0.0
+        rank = max(1, math.ceil(count * q / 100))
+        seen = 0
+        for index, n in buckets:
+            seen += n
+            if seen >= rank:
+                return min(_bucket_value(index), self.max_ns) / 1e9
+        return self.max_ns / 1e9
+
+    def summary(self) -> dict[str, float]:
+        """Return count, mean, p50/p95/p99 and max, in seconds."""
+        return {
+            "count": self.count,
+            "mean": self.total_ns / self.count / 1e9 if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": self.max_ns / 1e9,
+        }
+
+
+class TimingRegistry:
+    """In-memory registry of duration histograms, one per timed function."""
+
+    def __init__(self) -> None:
+        self._histograms: dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+        self._dump_at_exit = False
+
+    def histogram(self, name: str) -> Histogram:
+        """Return the histogram of `name`, creating it if needed."""
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(name, Histogram())
+        return histogram
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """Return the summary of every histogram."""
+        return {name: h.summary() for name, h in sorted(self._histograms.items())}
+
+    def dump(self) -> None:
+        """Log the summary of every histogram that has recorded a call."""
+        for name, s in self.summary().items():
+            if not s["count"]:
+                continue
+            logger.info(
+                f"{name} | count {s['count']} | mean {s['mean']:.6f}s"
+                f" | p50 {s['p50']:.6f}s | p95 {s['p95']:.6f}s"
+                f" | p99 {s['p99']:.6f}s | max {s['max']:.6f}s"
+            )
+
+    def dump_at_exit(self) -> None:
+        """Dump the summary when the interpreter exits (registered once)."""
+        with self._lock:
+            if not self._dump_at_exit:
+                atexit.register(self.dump)
+                self._dump_at_exit = True
+
+    def dump_every(self, interval: float) -> threading.Event:
+        """Dump the summary every `interval` seconds from a daemon thread.
+
+        Returns:
+            An event that stops the dumps when set.
+        """
+        stop = threading.Event()
+
+        def run() -> None:
+            while not stop.wait(interval):
+                self.dump()
+
+        threading.Thread(target=run, name="timing-dump", daemon=True).start()
+        return stop
+
+
+REGISTRY = TimingRegistry()
+
+
+def async_timed(
+    log: bool = False,
+    log_args: bool = False,
+    sample_rate: float = 1.0,
+    registry: TimingRegistry = REGISTRY,
+):
+    """Decorator to time an async function.
+
+    Durations are recorded into `registry`; nothing is logged unless `log` is set,
+    so the decorator can stay on hot coroutines. See `TimingRegistry.dump`.
+
+    Args:
+        log: Log a line when the call starts and finishes (off by default).
+        log_args: Include the call arguments in the start line.
+        sample_rate: Fraction of calls to time (the rest run untimed).
+        registry: Registry to record durations into.
+    """
+
+    def wrapper(func: Callable[P, Awaitable[R]]) -> Callable[P, Awaitable[R]]:
+        name = f"{func.__module__}.{func.__qualname__}"
+        histogram = registry.histogram(name)
+
+        @functools.wraps(func)
+        async def wrapped(*args: P.args, **kwargs: P.kwargs) -> R:
+            if sample_rate < 1.0 and random.random() >= sample_rate:
+                return await func(*args, **kwargs)
+            if log:
+                if log_args:
+                    logger.info(f"starting {func} with args {args} {kwargs}")
+                else:
+                    logger.info(f"starting {func}")
+            start = time.perf_counter_ns()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                total = time.perf_counter_ns() - start
+                histogram.record(total)
+                if log:
+                    logger.info(f"finished {func} in {total / 1e9:.4f} second(s)")
+
+        return wrapped
+
+    return wrapper
+
+
+def sync_timed(
+    log: bool = False,
+    log_args: bool = False,
+    sample_rate: float = 1.0,
+    registry: TimingRegistry = REGISTRY,
+):
+    """Decorator to time a sync function.
+
+    Args:
+        log: Log a line when the call starts and finishes (off by default).
+        log_args: Include the call arguments in the start line.
+        sample_rate: Fraction of calls to time (the rest run untimed).
+        registry: Registry to record durations into.
+    """
+
+    def wrapper(func: Callable[P, R]) -> Callable[P, R]:
+        name = f"{func.__module__}.{func.__qualname__}"
+        histogram = registry.histogram(name)
+
+        @functools.wraps(func)
+        def wrapped(*args: P.args, **kwargs: P.kwargs) -> R:
+            if sample_rate < 1.0 and random.random() >= sample_rate:
+                return func(*args, **kwargs)
+            if log:
+                if log_args:
+                    logger.info(f"starting {func} with args {args} {kwargs}")
+                else:
+                    logger.info(f"starting {func}")
+            start = time.perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                total = time.perf_counter_ns() - start
+                histogram.record(total)
+                if log:
+                    logger.info(f"finished {func} in {total / 1e9:.4f} second(s)")
+
+        return wrapped
+
+    return wrapper
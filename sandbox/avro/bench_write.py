@@ -0,0 +1,98 @@
+import asyncio
+import pathlib
+import tempfile
+import time
+from collections.abc import AsyncIterator
+from typing import Any
+
+from fastavro import parse_schema, writer
+from fastavro.types import Schema
+from loguru import logger
+
+from main import write_avro_file_stream
+
+SCHEMA = {
+    "type": "record",
+    "name": "User",
+    "fields": [
+        {"name": "name", "type": "string"},
+        {"name": "age", "type": "int"},
+        {"name": "email", "type": ["null", "string"], "default": None},
+    ],
+}
+BLOCK_RECORDS = (1_000, 10_000, 100_000)
+
+
+def make_record(i: int) -> dict[str, Any]:
+    """Make the i-th sample record."""
+    return {"name": f"user-{i}", "age": i % 100, "email": f"user-{i}@example.com"}
+
+
+async def produce(num_records: int) -> AsyncIterator[dict[str, Any]]:
+    """Async producer of sample records."""
+    for i in range(num_records):
+        yield make_record(i)
+
+
+async def bench_list(file: pathlib.Path, schema: Schema, num_records: int) -> float:
+    """Time the list-based path of `write_avro_file` (without its demo sleep).
+
+    Args:
+        file: The file path to write the Avro file.
+        schema: The Avro schema.
+        num_records: The number of records to write.
+
+    Returns:
+        The elapsed time in seconds.
+    """
+    start = time.perf_counter()
+    records = [record async for record in produce(num_records)]
+    with open(file, mode="wb") as f:
+        await asyncio.to_thread(writer, f, schema, records)
+    return time.perf_counter() - start
+
+
+async def bench_stream(
+    file: pathlib.Path, schema: Schema, num_records: int, block_records: int
+) -> float:
+    """Time `write_avro_file_stream`.
+
+    Args:
+        file: The file path to write the Avro file.
+        schema: The Avro schema.
+        num_records: The number of records to write.
+        block_records: The max number of records per block.
+
+    Returns:
+        The elapsed time in seconds.
+    """
+    start = time.perf_counter()
+    await write_avro_file_stream(
+        file, schema, produce(num_records), block_records=block_records
+    )
+    return time.perf_counter() - start
+
+
+async def main(num_records: int = 1_000_000, repeats: int = 3) -> None:
+    schema = parse_schema(SCHEMA)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file = pathlib.Path(tmp_dir) / "bench.avro"
+        results: dict[str, list[float]] = {"list": []}
+        for block_records in BLOCK_RECORDS:
+            results[f"stream/{block_records}"] = []
+        for _ in range(repeats):
+            results["list"].append(await bench_list(file, schema, num_records))
+            for block_records in BLOCK_RECORDS:
+                elapsed = await bench_stream(file, schema, num_records, block_records)
+                results[f"stream/{block_records}"].append(elapsed)
+
+    for name, times in results.items():
+        best = min(times)
+        logger.info(
+            f"{name:>14} | best {best:.4f} second(s)"
+            f" | {num_records / best:,.0f} records/s"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,233 @@
+import mmap
+import pathlib
+import zlib
+from collections.abc import Callable
+from io import BytesIO
+from typing import cast
+
+from fastavro import reader, schemaless_reader
+from fastavro.types import AvroMessage
+
+from schema_cache import SCHEMA_CACHE, SchemaCache
+
+MAGIC = b"Obj\x01"
+SYNC_SIZE = 16
+
+Buffer = bytes | bytearray | memoryview | mmap.mmap
+
+# Codecs decoded with cached schemas; files with other codecs go to fastavro.reader
+DECOMPRESSORS: dict[str, Callable[[bytes], bytes]] = {
+    "null": lambda data: data,
+    "deflate": lambda data: zlib.decompress(data, -15),
+}
+
+
+class IncompleteError(Exception):
+    """Raised when the buffer ends in the middle of a header or block."""
+
+
+def read_long(buf: Buffer, pos: int) -> tuple[int, int]:
+    """Read a zig-zag encoded Avro long.
+
+    Args:
+        buf: The buffer to read from.
+        pos: The offset of the long.
+
+    Returns:
+        The decoded value and the offset just after it.
+    """
+    shift = 0
+    acc = 0
+    while True:
+        if pos >= len(buf):
+            raise IncompleteError
+        b = buf[pos]
+        pos += 1
+        acc |= (b & 0x7F) << shift
+        if not b & 0x80:
+            return (acc >> 1) ^ -(acc & 1), pos
+        shift += 7
+
+
+def parse_metadata(buf: Buffer) -> tuple[dict[str, bytes], int]:
+    """Parse the magic and the metadata map of an Avro object container file.
+
+    Args:
+        buf: The buffer starting at the beginning of the file.
+
+    Returns:
+        The metadata and the offset of the sync marker that follows it.
+    """
+    if len(buf) < len(MAGIC):
+        raise IncompleteError
+    if bytes(buf[: len(MAGIC)]) != MAGIC:
+        raise ValueError("Not an Avro object container file")
+    pos = len(MAGIC)
+    metadata: dict[str, bytes] = {}
+    # metadata is a map<bytes>: blocks of `count` entries terminated by count 0
+    while True:
+        count, pos = read_long(buf, pos)
+        if count == 0:
+            break
+        if count < 0:
+            count = -count
+            _, pos = read_long(buf, pos)  # byte size of the block
+        for _ in range(count):
+            size, pos = read_long(buf, pos)
+            key = bytes(buf[pos : pos + size]).decode()
+            pos += size
+            size, pos = read_long(buf, pos)
+            if pos + size > len(buf):
+                raise IncompleteError
+            metadata[key] = bytes(buf[pos : pos + size])
+            pos += size
+    return metadata, pos
+
+
+def parse_header(buf: Buffer) -> tuple[int, bytes]:
+    """Parse the header of an Avro object container file.
+
+    Args:
+        buf: The buffer starting at the beginning of the file.
+
+    Returns:
+        The size of the header in bytes and the sync marker.
+    """
+    _, pos = parse_metadata(buf)
+    end = pos + SYNC_SIZE
+    if end > len(buf):
+        raise IncompleteError
+    return end, bytes(buf[pos:end])
+
+
+def parse_block(buf: Buffer, pos: int, sync: bytes) -> tuple[int, int]:
+    """Parse the framing of one data block.
+
+    Args:
+        buf: The buffer containing the block.
+        pos: The offset of the block.
+        sync: The sync marker of the file.
+
+    Returns:
+        The number of records in the block and the offset just after it.
+    """
+    count, pos = read_long(buf, pos)
+    size, pos = read_long(buf, pos)
+    end = pos + size + SYNC_SIZE
+    if end > len(buf):
+        raise IncompleteError
+    if bytes(buf[end - SYNC_SIZE : end]) != sync:
+        raise ValueError(f"Sync marker mismatch at offset {end - SYNC_SIZE}")
+    return count, end
+
+
+def decode_container(
+    buf: Buffer, schema_cache: SchemaCache = SCHEMA_CACHE
+) -> list[AvroMessage]:
+    """Decode a whole Avro object container file held in memory.
+
+    The writer schema is looked up in `schema_cache` instead of being parsed from
+    the header again, and each block is decoded in one call with the cached block
+    decoder.
+
+    Args:
+        buf: The content of the file.
+        schema_cache: The cache of parsed schemas.
+
+    Returns:
+        The list of records.
+    """
+    try:
+        metadata, pos = parse_metadata(buf)
+        sync = bytes(buf[pos : pos + SYNC_SIZE])
+        pos += SYNC_SIZE
+        decompress = DECOMPRESSORS.get(metadata.get("avro.codec", b"null").decode())
+        if decompress is None:
+            return list(reader(BytesIO(bytes(buf))))
+        decoder = schema_cache.get(metadata["avro.schema"].decode()).block_decoder
+
+        records: list[AvroMessage] = []
+        while pos < len(buf):
+            _, count_end = read_long(buf, pos)
+            size, data_pos = read_long(buf, count_end)
+            _, end = parse_block(buf, pos, sync)
+            data = decompress(bytes(buf[data_pos : data_pos + size]))
+            # count + records + 0 is exactly one block of an array of records
+            array = bytes(buf[pos:count_end]) + data + b"\x00"
+            block = schemaless_reader(BytesIO(array), decoder, None)
+            records.extend(cast(list[AvroMessage], block))
+            pos = end
+    except IncompleteError:
+        raise ValueError("Truncated Avro object container file") from None
+    return records
+
+
+def decode_blocks(header: bytes, blocks: bytes) -> list[AvroMessage]:
+    """Decode raw data blocks with the writer schema and codec of `header`.
+
+    Args:
+        header: The raw header of the file the blocks come from.
+        blocks: One or more consecutive raw blocks, including their sync markers.
+
+    Returns:
+        The list of records.
+    """
+    return decode_container(header + blocks)
+
+
+def split_file(
+    file: pathlib.Path, num_parts: int
+) -> tuple[bytes, list[tuple[int, int]]]:
+    """Split an Avro object container file into byte ranges on block boundaries.
+
+    Each cut point is the end of the first sync marker at or after an even split
+    of the data section, found by scanning a memory map of the file. The ranges
+    hold whole blocks only, so each can be decoded on its own with the header.
+
+    Args:
+        file: The file path of the Avro file.
+        num_parts: The desired number of ranges (fewer are returned when the file
+            has fewer blocks).
+
+    Returns:
+        The raw header and the list of (start, end) byte ranges in file order.
+    """
+    if num_parts < 1:
+        raise ValueError(f"num_parts must be >= 1, got {num_parts}")
+    with (
+        open(file, "rb") as fo,
+        mmap.mmap(fo.fileno(), 0, access=mmap.ACCESS_READ) as mm,
+    ):
+        header_size, sync = parse_header(mm)
+        header = mm[:header_size]
+        size = len(mm)
+        bounds = [header_size]
+        for i in range(1, num_parts):
+            target = header_size + (size - header_size) * i // num_parts
+            idx = mm.find(sync, max(target, bounds[-1]))
+            if idx == -1 or idx + SYNC_SIZE >= size:
+                break
+            bounds.append(idx + SYNC_SIZE)
+    if bounds[-1] < size:
+        bounds.append(size)
+    return header, list(zip(bounds, bounds[1:]))
+
+
+def decode_range(
+    file: pathlib.Path, header: bytes, start: int, end: int
+) -> list[AvroMessage]:
+    """Read and decode the blocks in one byte range of an Avro file.
+
+    Args:
+        file: The file path of the Avro file.
+        header: The raw header of the file.
+        start: The offset of the first block.
+        end: The offset just after the last block.
+
+    Returns:
+        The list of records.
+    """
+    with open(file, "rb") as fo:
+        fo.seek(start)
+        blocks = fo.read(end - start)
+    return decode_blocks(header, blocks)
@@ -1,13 +1,27 @@
 import asyncio
+import os
 import pathlib
-from io import BytesIO
+from collections.abc import AsyncIterable, AsyncIterator
+from concurrent.futures import Executor, ProcessPoolExecutor
 from typing import Any
 
 import aiofiles
-from fastavro import parse_schema, reader, writer
+from async_timer import REGISTRY, async_timed
+from fastavro import writer
 from fastavro.types import AvroMessage, Schema
+from fastavro.write import Writer
 from loguru import logger
-from utils import async_timed
+
+from blocks import (
+    IncompleteError,
+    decode_blocks,
+    decode_container,
+    decode_range,
+    parse_block,
+    parse_header,
+    split_file,
+)
+from schema_cache import SCHEMA_CACHE
 
 
 @async_timed()
@@ -18,28 +32,96 @@ async def write_avro_file(
 
     Args:
         file: The file path to write the Avro file.
-        schema: The Avro schema.
+        schema: The Avro schema. Parsed once per schema via SCHEMA_CACHE.
         records: The list of records to write.
     """
+    parsed_schema = SCHEMA_CACHE.get(schema).parsed
     with open(file, mode="wb") as f:
         await asyncio.sleep(3)
         # Use fastavro's writer to serialize data into the file
-        await asyncio.to_thread(writer, f, schema, records)
+        await asyncio.to_thread(writer, f, parsed_schema, records)
+
+
+@async_timed()
+async def write_avro_file_stream(
+    file: pathlib.Path,
+    schema: Schema,
+    records: AsyncIterable[dict[str, Any]],
+    block_records: int = 10000,
+    block_bytes: int = 1 << 20,
+) -> int:
+    """Write Avro file from an async iterable of records without materializing it.
+
+    Records are buffered into batches of `block_records`, and each batch is encoded
+    and appended to the file in another thread. A data block is flushed when the
+    batch ends or its encoded size reaches `block_bytes`, whichever comes first.
+
+    Args:
+        file: The file path to write the Avro file.
+        schema: The Avro schema.
+        records: The async iterable of records to write.
+        block_records: The max number of records per block.
+        block_bytes: The number of encoded bytes that triggers a block flush.
+
+    Returns:
+        The number of records written.
+    """
+    if block_records < 1:
+        raise ValueError(f"block_records must be >= 1, got {block_records}")
+
+    def write_batch(avro_writer: Writer, batch: list[dict[str, Any]]) -> None:
+        """Synchronously encodes a batch and appends it as data blocks."""
+        for record in batch:
+            avro_writer.write(record)  # CPU-bound operation
+        avro_writer.flush()  # blocking IO-bound operation
+
+    fo = await asyncio.to_thread(open, file, "wb")
+    try:
+        # Writing the header is blocking IO too
+        avro_writer = await asyncio.to_thread(
+            Writer, fo, SCHEMA_CACHE.get(schema).parsed, sync_interval=block_bytes
+        )
+        num_records = 0
+        batch: list[dict[str, Any]] = []
+        async for record in records:
+            batch.append(record)
+            if len(batch) >= block_records:
+                await asyncio.to_thread(write_batch, avro_writer, batch)
+                num_records += len(batch)
+                batch = []
+        if batch:
+            await asyncio.to_thread(write_batch, avro_writer, batch)
+            num_records += len(batch)
+    finally:
+        await asyncio.to_thread(fo.close)
+    return num_records
 
 
 @async_timed()
 async def write_avro_files(
-    args: list[tuple[pathlib.Path, Schema, list[dict[str, Any]]]],
+    args: list[
+        tuple[
+            pathlib.Path,
+            Schema,
+            list[dict[str, Any]] | AsyncIterable[dict[str, Any]],
+        ]
+    ],
 ):
     """Write Avro files with the given schema and records.
 
     Args:
         args: The list of tuples containing the file path, schema, and records.
+            Records given as an async iterable are streamed by
+            `write_avro_file_stream`.
     """
     try:
         async with asyncio.TaskGroup() as tg:
             tasks = [
-                tg.create_task(write_avro_file(file, schema, records))
+                tg.create_task(
+                    write_avro_file(file, schema, records)
+                    if isinstance(records, list)
+                    else write_avro_file_stream(file, schema, records)
+                )
                 for file, schema, records in args
             ]
         for task in tasks:
@@ -63,8 +145,9 @@ async def read_avro_file(file: pathlib.Path):
     def sync_read_avro_file(file: pathlib.Path) -> list[AvroMessage]:
         """Synchronously reads all records from an Avro file."""
         with open(file, "rb") as fo:
-            avro_reader = reader(fo)  # blocking IO-bound operation
-            records = [record for record in avro_reader]  # CPU-bound operation
+            byte_content = fo.read()  # blocking IO-bound operation
+        # CPU-bound operation, with the writer schema taken from SCHEMA_CACHE
+        records = decode_container(byte_content)
         return records
 
     # Use asyncio.to_thread to offload the blocking operation to a thread
@@ -86,11 +169,116 @@ async def read_avro_file_v2(file: pathlib.Path):
     async with aiofiles.open(file, mode="rb") as fo:
         # `aiofiles` doesn't work with fastavro directly, so read the file into memory
         byte_content = await fo.read()  # non-blocking IO-bound operation
-        avro_reader = reader(BytesIO(byte_content))  # CPU-bound operation
-    content = list(avro_reader)
+    # CPU-bound operation, with the writer schema taken from SCHEMA_CACHE
+    content = decode_container(byte_content)
     return content
 
 
+@async_timed()
+async def read_avro_file_parallel(
+    file: pathlib.Path,
+    pool: Executor | None = None,
+    num_parts: int | None = None,
+) -> list[AvroMessage]:
+    """Read a single Avro file on multiple cores by splitting it on sync markers.
+
+    The file is cut into byte ranges of whole blocks, each range is decoded in the
+    pool together with the header, and the results are concatenated in file order.
+
+    Args:
+        file: The file path to read the Avro file.
+        pool: The executor to decode in. A temporary ProcessPoolExecutor if None.
+        num_parts: The number of ranges. The number of CPUs if None.
+
+    Returns:
+        The list of records.
+    """
+    num_parts = num_parts or os.cpu_count() or 1
+    header, ranges = await asyncio.to_thread(split_file, file, num_parts)
+
+    async def decode_all(executor: Executor) -> list[list[AvroMessage]]:
+        loop = asyncio.get_running_loop()
+        call_coros = [
+            loop.run_in_executor(executor, decode_range, file, header, start, end)
+            for start, end in ranges
+        ]
+        return await asyncio.gather(*call_coros)
+
+    if pool is None:
+        with ProcessPoolExecutor(max_workers=max(1, len(ranges))) as executor:
+            parts = await decode_all(executor)
+    else:
+        parts = await decode_all(pool)
+    return [record for part in parts for record in part]
+
+
+async def aiter_avro_records(
+    file: pathlib.Path, batch_size: int = 1000, chunk_size: int = 1 << 20
+) -> AsyncIterator[list[AvroMessage]]:
+    """Stream the records of an Avro file in batches.
+
+    The file is read in chunks by aiofiles, and each complete data block is decoded
+    in another thread as soon as it has arrived. Nothing is read ahead while the
+    consumer holds a batch, so memory stays around one chunk, one block and one
+    batch whatever the file size.
+
+    Args:
+        file: The file path to read the Avro file.
+        batch_size: The number of records per batch (the last one may be smaller).
+        chunk_size: The number of bytes per read.
+
+    Yields:
+        The list of records of each batch.
+    """
+    if batch_size < 1:
+        raise ValueError(f"batch_size must be >= 1, got {batch_size}")
+
+    buf = bytearray()
+    header: bytes | None = None
+    sync = b""
+    pending: list[AvroMessage] = []
+    async with aiofiles.open(file, mode="rb") as fo:
+        eof = False
+        while not eof:
+            chunk = await fo.read(chunk_size)  # non-blocking IO-bound operation
+            eof = not chunk
+            buf += chunk
+            if header is None:
+                try:
+                    header_size, sync = parse_header(buf)
+                except IncompleteError:
+                    if eof:
+                        raise ValueError(f"Truncated Avro header in {file}")
+                    continue
+                header = bytes(buf[:header_size])
+                del buf[:header_size]
+
+            # Cut every complete block out of the buffer
+            pos = 0
+            while pos < len(buf):
+                try:
+                    _, end = parse_block(buf, pos, sync)
+                except IncompleteError:
+                    break
+                pos = end
+            if pos == 0:
+                if eof and buf:
+                    raise ValueError(f"Truncated Avro block in {file}")
+                continue
+            blocks = bytes(buf[:pos])
+            del buf[:pos]
+
+            # CPU-bound operation
+            pending.extend(await asyncio.to_thread(decode_blocks, header, blocks))
+            while len(pending) >= batch_size:
+                yield pending[:batch_size]
+                del pending[:batch_size]
+            if eof and buf:
+                raise ValueError(f"Truncated Avro block in {file}")
+    if pending:
+        yield pending
+
+
 @async_timed()
 async def read_avro_files(files: list[pathlib.Path]) -> list[list[AvroMessage]]:
     """Read Avro files and return the records
@@ -121,7 +309,7 @@ async def main():
             {"name": "email", "type": ["null", "string"], "default": None},
         ],
     }
-    parsed_schema = parse_schema(schema)
+    parsed_schema = SCHEMA_CACHE.get(schema).parsed
 
     # Sample data to write
     records = [
@@ -143,6 +331,12 @@ async def main():
     contents = await read_avro_files(files=[save_dir / "1.avro", save_dir / "2.avro"])
     logger.info(f"Read contents: {contents}")
 
+    # Stream the saved Avro file batch by batch
+    async for batch in aiter_avro_records(save_dir / "1.avro", batch_size=1):
+        logger.info(f"Read batch: {batch}")
+    logger.info(f"Schema cache: {SCHEMA_CACHE.stats()}")
+
 
 if __name__ == "__main__":
+    REGISTRY.dump_at_exit()
     asyncio.run(main(), debug=True)
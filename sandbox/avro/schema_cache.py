@@ -0,0 +1,133 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+from fastavro import parse_schema
+from fastavro.schema import fingerprint, to_parsing_canonical_form
+from fastavro.types import Schema
+
+
+@dataclass(frozen=True)
+class CachedSchema:
+    """A parsed schema and the decoder compiled from it.
+
+    Attributes:
+        key: The SHA-256 of the full schema JSON with sorted keys, the cache key.
+        fingerprint: The SHA-256 fingerprint of the schema's Parsing Canonical Form.
+        parsed: The parsed schema.
+        block_decoder: The parsed schema of an array of `parsed`. A data block is
+            laid out like one block of such an array, so it decodes a whole block
+            in a single `schemaless_reader` call.
+    """
+
+    key: str
+    fingerprint: str
+    parsed: Schema
+    block_decoder: Schema
+
+
+def schema_key(schema: Schema) -> str:
+    """Return the SHA-256 of the full schema JSON, independent of key order."""
+    text = json.dumps(schema, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class SchemaCache:
+    """Process-wide, size-bounded LRU cache of parsed Avro schemas.
+
+    Entries are keyed by the SHA-256 of the full schema serialized with sorted keys,
+    so schemas that differ only in key order or whitespace share one entry. The
+    Parsing Canonical Form is not used as the key: it drops attributes that change
+    how data is read and written (logicalType, default, aliases), so a
+    `timestamp-millis` field would be decoded with a plain `long` schema. Its
+    fingerprint is kept as metadata. To skip hashing on repeated lookups, the raw
+    JSON text of file headers is also remembered.
+
+    Args:
+        maxsize: The max number of parsed schemas to keep.
+    """
+
+    def __init__(self, maxsize: int = 128) -> None:
+        if maxsize < 1:
+            raise ValueError(f"maxsize must be >= 1, got {maxsize}")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, CachedSchema] = OrderedDict()
+        # raw JSON text -> key
+        self._by_text: OrderedDict[str, str] = OrderedDict()
+
+    def get(self, schema: Schema | str) -> CachedSchema:
+        """Return the cached entry of a schema, parsing it on a miss.
+
+        Args:
+            schema: The schema as a dict (parsed or not) or as JSON text.
+
+        Returns:
+            The cached schema.
+        """
+        key = None
+        if isinstance(schema, str):
+            with self._lock:
+                key = self._by_text.get(schema)
+                if key is not None and key in self._entries:
+                    self.hits += 1
+                    self._entries.move_to_end(key)
+                    return self._entries[key]
+
+        schema_obj = json.loads(schema) if isinstance(schema, str) else schema
+        if key is None:
+            key = schema_key(schema_obj)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self.hits += 1
+                self._entries.move_to_end(key)
+            else:
+                self.misses += 1
+                parsed = parse_schema(schema_obj)
+                entry = CachedSchema(
+                    key=key,
+                    fingerprint=fingerprint(
+                        to_parsing_canonical_form(schema_obj), "SHA-256"
+                    ),
+                    parsed=parsed,
+                    block_decoder=parse_schema({"type": "array", "items": parsed}),
+                )
+                self._entries[key] = entry
+                if len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+            if isinstance(schema, str):
+                self._remember(self._by_text, schema, key)
+            return entry
+
+    def stats(self) -> dict[str, int]:
+        """Return the hit/miss counters and the current size."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+            }
+
+    def clear(self) -> None:
+        """Drop every entry and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._by_text.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def _remember(self, index: OrderedDict, key: Any, value: Any) -> None:
+        """Add a lookup key, bounding the index to a few times `maxsize`."""
+        index[key] = value
+        index.move_to_end(key)
+        if len(index) > 4 * self.maxsize:
+            index.popitem(last=False)
+
+
+SCHEMA_CACHE = SchemaCache()
@@ -1,28 +0,0 @@
-import functools
-import time
-from typing import Awaitable, Callable, ParamSpec, TypeVar
-
-from loguru import logger
-
-P = ParamSpec("P")  # For function parameters
-R = TypeVar("R", bound=Awaitable)  # For return type
-
-
-def async_timed():
-    """Decorator to time an async function."""
-
-    def wrapper(func: Callable[P, R]) -> Callable[P, Awaitable[R]]:
-        @functools.wraps(func)
-        async def wrapped(*args: P.args, **kwargs: P.kwargs) -> R:
-            logger.info(f"starting {func} with args {args} {kwargs}")
-            start = time.perf_counter()
-            try:
-                return await func(*args, **kwargs)
-            finally:
-                end = time.perf_counter()
-                total = end - start
-                logger.info(f"finished {func} in {total:.4f} second(s)")
-
-        return wrapped
-
-    return wrapper
@@ -0,0 +1,95 @@
+import hashlib
+import os
+import pathlib
+import tempfile
+
+import polars as pl
+from loguru import logger
+
+
+class AvroIpcCache:
+    """Arrow IPC sidecar cache for Avro files.
+
+    Each `*.avro` is decoded once and stored as an uncompressed Arrow IPC file in
+    `cache_dir`; later reads memory-map it instead of decoding the Avro again.
+    Entries are keyed by the resolved path, size and mtime of the source, so a
+    changed source misses and its stale entries are removed. The cache lives on
+    the filesystem only, so instances are cheap to pickle into worker processes.
+
+    Args:
+        cache_dir: Dir to store the IPC files in
+        max_bytes: Total size of the cache; least recently used entries are evicted
+            beyond it (None for unbounded)
+    """
+
+    def __init__(self, cache_dir: pathlib.Path, max_bytes: int | None = None) -> None:
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def __call__(self, avro_file: pathlib.Path) -> pl.DataFrame:
+        return self.read(avro_file)
+
+    def read(self, avro_file: pathlib.Path) -> pl.DataFrame:
+        """Read an Avro file through the cache
+
+        Args:
+            avro_file: Avro file to read
+
+        Returns:
+            pl.DataFrame: DataFrame, memory-mapped on a cache hit
+        """
+        path_key, ipc_path = self._entry(avro_file)
+        try:
+            # mtime of the entry doubles as its last access time for LRU. Unlike
+            # touch(), utime never creates an empty entry if another process has
+            # just evicted it
+            os.utime(ipc_path)
+            df = pl.read_ipc(ipc_path, memory_map=True, rechunk=False)
+        except FileNotFoundError:  # not cached, or evicted in the meantime
+            pass
+        else:
+            logger.info(f"Cache hit  | {avro_file} -> {ipc_path}")
+            return df
+
+        logger.info(f"Cache miss | {avro_file}")
+        df = pl.read_avro(avro_file)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        for stale in self.cache_dir.glob(f"{path_key}-*.arrow"):
+            stale.unlink(missing_ok=True)
+        # Write to a temp file and rename so concurrent readers never see a
+        # partially written entry
+        fd, tmp_name = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        os.close(fd)
+        df.write_ipc(tmp_name, compression="uncompressed")
+        os.replace(tmp_name, ipc_path)
+        self.evict()
+        return df
+
+    def evict(self) -> None:
+        """Remove least recently used entries until the cache fits in `max_bytes`"""
+        if self.max_bytes is None or not self.cache_dir.exists():
+            return
+        entries = []
+        for entry in self.cache_dir.glob("*.arrow"):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:  # evicted by another process
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, entry))
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            entry.unlink(missing_ok=True)
+            total -= size
+            logger.info(f"Cache evict | {entry}")
+
+    def _entry(self, avro_file: pathlib.Path) -> tuple[str, pathlib.Path]:
+        """Return the per-path key and the cache entry path of `avro_file`"""
+        resolved = avro_file.resolve()
+        stat = resolved.stat()
+        path_key = hashlib.sha256(str(resolved).encode()).hexdigest()[:16]
+        ipc_path = (
+            self.cache_dir / f"{path_key}-{stat.st_size}-{stat.st_mtime_ns}.arrow"
+        )
+        return path_key, ipc_path
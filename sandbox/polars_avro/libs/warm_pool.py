@@ -0,0 +1,85 @@
+import atexit
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+import polars as pl
+
+# Imported once by the forkserver, so forked workers start with them loaded
+PRELOAD = ["numpy", "polars", "fastavro", "loguru"]
+
+_POOLS: dict[int, ProcessPoolExecutor] = {}
+
+
+def warm_up() -> None:
+    """Initializer of warm workers: run a tiny workload before the first task
+
+    This starts the Polars thread pool and grows the allocator's arenas, so the
+    first real task does not pay for them.
+    """
+    df = pl.DataFrame({"x": np.arange(1 << 16, dtype=np.float64)})
+    df.select(pl.col("x").sum().alias("sum"), pl.col("x").sort().head(1))
+    buf = io.BytesIO()
+    df.head(16).write_avro(buf)
+    buf.seek(0)
+    pl.read_avro(buf)
+
+
+def _ping(delay: float) -> int:
+    time.sleep(delay)
+    return os.getpid()
+
+
+def spawn_workers(pool: ProcessPoolExecutor, max_workers: int) -> float:
+    """Make the pool start all its workers now instead of on demand
+
+    Args:
+        pool: Process pool
+        max_workers: Number of workers of the pool
+
+    Returns:
+        float: Seconds until every worker answered
+    """
+    start = time.perf_counter()
+    pids: set[int] = set()
+    while len(pids) < max_workers:
+        futures = [pool.submit(_ping, 0.01) for _ in range(max_workers)]
+        pids.update(future.result() for future in futures)
+    return time.perf_counter() - start
+
+
+def get_warm_pool(max_workers: int) -> ProcessPoolExecutor:
+    """Return the persistent, pre-warmed process pool of `max_workers` workers
+
+    The pool is created on first use and reused by later calls in the same
+    process. Workers are forked from a forkserver that has preloaded `PRELOAD`,
+    run `warm_up` once, and are never recycled, so no task pays for importing
+    Polars or starting a process.
+
+    Args:
+        max_workers: Number of processes
+
+    Returns:
+        ProcessPoolExecutor: The shared pool; do not shut it down
+    """
+    pool = _POOLS.get(max_workers)
+    if pool is None:
+        mp_context = get_context("forkserver")
+        mp_context.set_forkserver_preload(PRELOAD)
+        pool = ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=mp_context, initializer=warm_up
+        )
+        spawn_workers(pool, max_workers)
+        _POOLS[max_workers] = pool
+    return pool
+
+
+@atexit.register
+def shutdown_warm_pools() -> None:
+    """Shut down every warm pool"""
+    for pool in _POOLS.values():
+        pool.shutdown(wait=True, cancel_futures=True)
+    _POOLS.clear()
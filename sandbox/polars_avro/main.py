@@ -1,20 +1,54 @@
-from typing import Literal
+from typing import Any, Callable, Iterator, Literal, Self
 import polars as pl
 import numpy as np
+import contextlib
+import csv
+import datetime
+import json
+import math
+import os
 import pathlib
+import platform
+import resource
+import statistics
+import tempfile
+import threading
 from loguru import logger
 import asyncio
 from multiprocessing import get_context
 
-from pydantic import Field, BaseModel
+from pydantic import Field, BaseModel, model_validator
 from pydantic_settings import (
     BaseSettings,
     CliApp,
     CliSubCommand,
 )
 import time
-from libs import sync_timed, async_timed
-from concurrent.futures import ProcessPoolExecutor
+from libs import (
+    REGISTRY,
+    AvroIpcCache,
+    get_warm_pool,
+    spawn_workers,
+    sync_timed,
+    async_timed,
+)
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+Version = Literal["v1", "v2", "v3", "v4", "stream"]
+StartMethod = Literal["fork", "spawn", "forkserver"]
+Reader = Callable[[pathlib.Path], pl.DataFrame]
+
+
+def _check_pool_options(options: Any) -> None:
+    """Default `max_tasks_per_child` to None with fork, which does not support it
+
+    Raises:
+        ValueError: If both fork and `max_tasks_per_child` were given
+    """
+    if options.start_method == "fork" and options.max_tasks_per_child is not None:
+        if "max_tasks_per_child" in options.model_fields_set:
+            raise ValueError("max_tasks_per_child is not supported with fork")
+        options.max_tasks_per_child = None
 
 
 class Init(BaseModel):
@@ -28,6 +62,13 @@ class Init(BaseModel):
     save_dir: pathlib.Path = Field(
         default=pathlib.Path("./data"), description="Save dir"
     )
+    workers: int = Field(
+        default=os.cpu_count() or 1, ge=1, description="Number of processes"
+    )
+    seed: int = Field(default=0, description="Seed of the random embeddings")
+    dtype: Literal["float32", "float64"] = Field(
+        default="float64", description="Float type of the embeddings"
+    )
 
     def cli_cmd(self) -> None:
         logger.info(f"Args: {self.model_dump()}")
@@ -36,22 +77,187 @@ class Init(BaseModel):
             num_records=self.num_records,
             save_dir=self.save_dir,
             ndim=self.ndim,
+            workers=self.workers,
+            seed=self.seed,
+            dtype=self.dtype,
         )
 
 
 class Run(BaseModel):
     """Run the benchmarking"""
 
-    version: Literal["v1", "v2"] = Field(
+    version: Version = Field(
         default="v1", description="The version to run the benchmarking"
     )
     save_dir: pathlib.Path = Field(
         default=pathlib.Path("./data"), description="Save dir"
     )
+    max_in_flight: int = Field(
+        default=8,
+        ge=1,
+        description="Max number of decoded-but-unconsumed frames (stream only)",
+    )
+    transfer: Literal["pickle", "ipc"] = Field(
+        default="pickle",
+        description="How workers hand frames back to the parent (v2 only)",
+    )
+    max_workers: int = Field(
+        default=7,
+        ge=1,
+        description="Number of processes (v2, v4, stream) or threads (v3)",
+    )
+    max_tasks_per_child: int | None = Field(
+        default=5,
+        ge=1,
+        description="Tasks a worker process runs before it is replaced (None: never)",
+    )
+    start_method: StartMethod | None = Field(
+        default=None,
+        description="multiprocessing start method (None for the platform default)",
+    )
+    warm_pool: bool = Field(
+        default=False,
+        description="Reuse a persistent pre-warmed forkserver pool across runs",
+    )
+    threads_per_worker: int = Field(
+        default=4,
+        ge=1,
+        description="Number of threads in each worker process (v4 only)",
+    )
+    cache: bool = Field(
+        default=False, description="Read through the Arrow IPC sidecar cache"
+    )
+    cache_dir: pathlib.Path | None = Field(
+        default=None, description="Cache dir (None for <save_dir>/.ipc_cache)"
+    )
+    cache_max_bytes: int | None = Field(
+        default=None, ge=0, description="Max size of the cache (None: unbounded)"
+    )
+
+    @model_validator(mode="after")
+    def _check_pool(self) -> Self:
+        _check_pool_options(self)
+        return self
+
+    def cli_cmd(self) -> None:
+        logger.info(f"Args: {self.model_dump()}")
+        reader = None
+        if self.cache:
+            cache_dir = self.cache_dir or self.save_dir / ".ipc_cache"
+            reader = AvroIpcCache(cache_dir, max_bytes=self.cache_max_bytes)
+        _run_benchmarking(
+            version=self.version,
+            save_dir=self.save_dir,
+            max_in_flight=self.max_in_flight,
+            transfer=self.transfer,
+            max_workers=self.max_workers,
+            max_tasks_per_child=self.max_tasks_per_child,
+            start_method=self.start_method,
+            warm_pool=self.warm_pool,
+            threads_per_worker=self.threads_per_worker,
+            reader=reader,
+        )
+
+
+class BenchTransfer(BaseModel):
+    """Compare pickle vs. memory-mapped Arrow IPC result transfer of v2"""
+
+    save_dir: pathlib.Path = Field(
+        default=pathlib.Path("./data"), description="Save dir"
+    )
+    repeats: int = Field(default=3, ge=1, description="Number of runs per transfer")
+
+    def cli_cmd(self) -> None:
+        logger.info(f"Args: {self.model_dump()}")
+        _bench_transfer(save_dir=self.save_dir, repeats=self.repeats)
+
+
+class BenchPool(BaseModel):
+    """Compare worker spawn cost and time-to-first-result of fresh vs. warm pools"""
+
+    save_dir: pathlib.Path = Field(
+        default=pathlib.Path("./data"), description="Save dir"
+    )
+    max_workers: int = Field(default=7, ge=1, description="Number of processes")
+    repeats: int = Field(default=3, ge=2, description="Number of runs per pool")
+    max_tasks_per_child: int | None = Field(
+        default=5,
+        ge=1,
+        description="Tasks a worker process runs before it is replaced (fresh pool)",
+    )
+    start_method: StartMethod | None = Field(
+        default=None,
+        description="multiprocessing start method of the fresh pool",
+    )
+
+    @model_validator(mode="after")
+    def _check_pool(self) -> Self:
+        _check_pool_options(self)
+        return self
 
     def cli_cmd(self) -> None:
         logger.info(f"Args: {self.model_dump()}")
-        _run_benchmarking(version=self.version, save_dir=self.save_dir)
+        _bench_pool(
+            save_dir=self.save_dir,
+            max_workers=self.max_workers,
+            repeats=self.repeats,
+            max_tasks_per_child=self.max_tasks_per_child,
+            start_method=self.start_method,
+        )
+
+
+class Bench(BaseModel):
+    """Run a matrix of versions x workers x file counts and write a report"""
+
+    save_dir: pathlib.Path = Field(
+        default=pathlib.Path("./data"), description="Save dir"
+    )
+    versions: list[Version] = Field(
+        default=["v1", "v2", "v3", "v4", "stream"], description="Versions to run"
+    )
+    workers: list[int] = Field(default=[7], description="Worker counts to run")
+    file_counts: list[int] = Field(
+        default=[300], description="Number of Avro files to read per run"
+    )
+    warmup: int = Field(default=1, ge=0, description="Warmup runs per case")
+    repeats: int = Field(default=5, ge=1, description="Measured runs per case")
+    max_tasks_per_child: int | None = Field(
+        default=5,
+        ge=1,
+        description="Tasks a worker process runs before it is replaced (None: never)",
+    )
+    start_method: StartMethod | None = Field(
+        default=None,
+        description="multiprocessing start method (None for the platform default)",
+    )
+    warm_pool: bool = Field(
+        default=False,
+        description="Reuse a persistent pre-warmed forkserver pool across runs",
+    )
+    output: pathlib.Path = Field(
+        default=pathlib.Path("./bench.json"),
+        description="Report path (.json or .csv)",
+    )
+
+    @model_validator(mode="after")
+    def _check_pool(self) -> Self:
+        _check_pool_options(self)
+        return self
+
+    def cli_cmd(self) -> None:
+        logger.info(f"Args: {self.model_dump()}")
+        _bench(
+            save_dir=self.save_dir,
+            versions=self.versions,
+            workers=self.workers,
+            file_counts=self.file_counts,
+            warmup=self.warmup,
+            repeats=self.repeats,
+            max_tasks_per_child=self.max_tasks_per_child,
+            start_method=self.start_method,
+            warm_pool=self.warm_pool,
+            output=self.output,
+        )
 
 
 class Cmd(BaseSettings):
@@ -59,48 +265,206 @@ class Cmd(BaseSettings):
 
     init: CliSubCommand[Init]
     run: CliSubCommand[Run]
+    bench_transfer: CliSubCommand[BenchTransfer]
+    bench_pool: CliSubCommand[BenchPool]
+    bench: CliSubCommand[Bench]
 
     def cli_cmd(self) -> None:
         CliApp.run_subcommand(self)
 
 
 def _init_avro_files(
-    num_avro_files: int, num_records: int, save_dir: pathlib.Path, ndim: int
+    num_avro_files: int,
+    num_records: int,
+    save_dir: pathlib.Path,
+    ndim: int,
+    workers: int = 1,
+    seed: int = 0,
+    dtype: Literal["float32", "float64"] = "float64",
 ) -> None:
     """Init Avro files to conduct benchmarking
 
+    Each file gets its own child of `np.random.SeedSequence(seed)`, so the output
+    is the same for a given seed whatever the number of workers.
+
     Args:
         num_avro_files: Number of Avro files to generate
         num_records: Number of records per file
         save_dir: Save dir
         ndim: Number of dimensions
+        workers: Number of processes
+        seed: Seed of the random embeddings
+        dtype: Float type of the embeddings
     """
     if not save_dir.exists():
         save_dir.mkdir(exist_ok=True)
 
-    for i in range(num_avro_files):
-        save_path = save_dir / f"{i:05d}.avro"
-        if i % 10 == 0:
-            logger.info(f"Generating Avro file {save_path}...")
-        df = pl.from_dict({"embedding": np.random.rand(num_records, ndim).tolist()})
-        df.write_avro(save_path, name="embedding")
+    save_paths = [save_dir / f"{i:05d}.avro" for i in range(num_avro_files)]
+    seeds = np.random.SeedSequence(seed).spawn(num_avro_files)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(
+            _write_avro_file,
+            save_paths,
+            seeds,
+            [num_records] * num_avro_files,
+            [ndim] * num_avro_files,
+            [dtype] * num_avro_files,
+        )
+        for i, save_path in enumerate(results):
+            if i % 10 == 0:
+                logger.info(f"Generated Avro file {save_path}")
+
+
+def _write_avro_file(
+    save_path: pathlib.Path,
+    seed: np.random.SeedSequence,
+    num_records: int,
+    ndim: int,
+    dtype: Literal["float32", "float64"],
+) -> pathlib.Path:
+    """Write one Avro file of random embeddings
+
+    The NumPy buffer is wrapped as a fixed-size `pl.Array` without going through
+    Python floats, then cast to `pl.List` since Avro has no fixed-size arrays.
+
+    Args:
+        save_path: Path to write
+        seed: Seed of this file's RNG
+        num_records: Number of records
+        ndim: Number of dimensions
+        dtype: Float type of the embeddings
+
+    Returns:
+        pathlib.Path: Path written
+    """
+    rng = np.random.default_rng(seed)
+    embeddings = rng.random((num_records, ndim), dtype=np.dtype(dtype))
+    inner = pl.Float32 if dtype == "float32" else pl.Float64
+    df = pl.DataFrame([pl.Series("embedding", embeddings).cast(pl.List(inner))])
+    df.write_avro(save_path, name="embedding")
+    return save_path
 
 
-def _run_benchmarking(version: Literal["v1", "v2"], save_dir: pathlib.Path) -> None:
+def _run_benchmarking(
+    version: Version,
+    save_dir: pathlib.Path,
+    max_in_flight: int = 8,
+    transfer: Literal["pickle", "ipc"] = "pickle",
+    max_workers: int = 7,
+    max_tasks_per_child: int | None = 5,
+    start_method: StartMethod | None = None,
+    warm_pool: bool = False,
+    threads_per_worker: int = 4,
+    reader: Reader | None = None,
+) -> None:
     """Run the benchmarking to read Avro files
 
     Args:
         version: version to run the benchmarking
+        save_dir: Save dir
+        max_in_flight: Max number of decoded-but-unconsumed frames (stream only)
+        transfer: How workers hand frames back to the parent (v2 only)
+        max_workers: Number of processes (v2, v4, stream) or threads (v3)
+        max_tasks_per_child: Tasks a worker process runs before it is replaced
+        start_method: multiprocessing start method
+        warm_pool: Use the persistent pre-warmed process pool
+        threads_per_worker: Number of threads in each worker process (v4 only)
+        reader: Function to read one Avro file (None for `_read_avro_sync`)
+    """
+    num_files, df = _read_avro_dir(
+        version=version,
+        save_dir=save_dir,
+        max_in_flight=max_in_flight,
+        transfer=transfer,
+        max_workers=max_workers,
+        max_tasks_per_child=max_tasks_per_child,
+        start_method=start_method,
+        warm_pool=warm_pool,
+        threads_per_worker=threads_per_worker,
+        reader=reader,
+    )
+    logger.info(f"Read {num_files} Avro files, {len(df)} records")
+
+
+def _read_avro_dir(
+    version: Version,
+    save_dir: pathlib.Path,
+    max_in_flight: int = 8,
+    transfer: Literal["pickle", "ipc"] = "pickle",
+    max_workers: int = 7,
+    max_tasks_per_child: int | None = 5,
+    start_method: StartMethod | None = None,
+    warm_pool: bool = False,
+    threads_per_worker: int = 4,
+    reader: Reader | None = None,
+) -> tuple[int, pl.DataFrame]:
+    """Read all Avro files in `save_dir` with the given version
+
+    Args:
+        version: version to run the benchmarking
+        save_dir: Save dir
+        max_in_flight: Max number of decoded-but-unconsumed frames (stream only)
+        transfer: How workers hand frames back to the parent (v2 only)
+        max_workers: Number of processes (v2, v4, stream) or threads (v3)
+        max_tasks_per_child: Tasks a worker process runs before it is replaced
+        start_method: multiprocessing start method
+        warm_pool: Use the persistent pre-warmed process pool
+        threads_per_worker: Number of threads in each worker process (v4 only)
+        reader: Function to read one Avro file (None for `_read_avro_sync`)
+
+    Returns:
+        tuple[int, pl.DataFrame]: Number of files read and the concatenated DataFrame
     """
+    reader = reader or _read_avro_sync
     if version == "v1":
-        dfs = _run_benchmarking_v1(save_dir)
+        dfs = _run_benchmarking_v1(save_dir, reader=reader)
+        num_files, df = len(dfs), pl.concat(dfs)
     elif version == "v2":
-        dfs = asyncio.run(_run_benchmarking_v2(save_dir))
+        dfs = asyncio.run(
+            _run_benchmarking_v2(
+                save_dir,
+                transfer=transfer,
+                reader=reader,
+                max_workers=max_workers,
+                max_tasks_per_child=max_tasks_per_child,
+                start_method=start_method,
+                warm_pool=warm_pool,
+            )
+        )
+        num_files, df = len(dfs), pl.concat(dfs)
+    elif version == "v3":
+        dfs = asyncio.run(
+            _run_benchmarking_v3(save_dir, max_workers=max_workers, reader=reader)
+        )
+        num_files, df = len(dfs), pl.concat(dfs)
+    elif version == "v4":
+        dfs = asyncio.run(
+            _run_benchmarking_v4(
+                save_dir,
+                max_workers=max_workers,
+                max_tasks_per_child=max_tasks_per_child,
+                start_method=start_method,
+                warm_pool=warm_pool,
+                threads_per_worker=threads_per_worker,
+                reader=reader,
+            )
+        )
+        num_files, df = len(dfs), pl.concat(dfs)
+    elif version == "stream":
+        num_files, df = asyncio.run(
+            _run_benchmarking_stream(
+                save_dir,
+                max_in_flight=max_in_flight,
+                reader=reader,
+                max_workers=max_workers,
+                max_tasks_per_child=max_tasks_per_child,
+                start_method=start_method,
+                warm_pool=warm_pool,
+            )
+        )
     else:
         raise ValueError(f"Invalid version: {version}")
-
-    df = pl.concat(dfs)
-    logger.info(f"Read {len(dfs)} Avro files, {len(df)} records")
+    return num_files, df
 
 
 def _read_avro_sync(avro_file: pathlib.Path) -> pl.DataFrame:
@@ -110,44 +474,693 @@ def _read_avro_sync(avro_file: pathlib.Path) -> pl.DataFrame:
     return df
 
 
+def _read_avro_batch_threaded(
+    avro_files: list[pathlib.Path], threads: int, reader: Reader = _read_avro_sync
+) -> list[pl.DataFrame]:
+    """Read a batch of Avro files with a thread pool inside one worker process
+
+    Args:
+        avro_files: Avro files to read
+        threads: Number of threads
+        reader: Function to read one Avro file
+
+    Returns:
+        list[pl.DataFrame]: List of DataFrames in the order of `avro_files`
+    """
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        return list(pool.map(reader, avro_files))
+
+
+@contextlib.contextmanager
+def _make_process_pool(
+    max_workers: int,
+    max_tasks_per_child: int | None,
+    start_method: StartMethod | None,
+    warm_pool: bool = False,
+) -> Iterator[ProcessPoolExecutor]:
+    """Provide the process pool shared by the process-based versions
+
+    Args:
+        max_workers: Number of processes
+        max_tasks_per_child: Tasks a worker process runs before it is replaced
+        start_method: multiprocessing start method (None for the platform default)
+        warm_pool: Use the persistent pre-warmed forkserver pool, which outlives
+            the block; `max_tasks_per_child` and `start_method` are ignored
+
+    Yields:
+        ProcessPoolExecutor: Process pool
+    """
+    if warm_pool:
+        yield get_warm_pool(max_workers)
+        return
+    mp_context = get_context(start_method) if start_method is not None else None
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        max_tasks_per_child=max_tasks_per_child,
+        mp_context=mp_context,
+    ) as pool:
+        yield pool
+
+
+def _read_avro_to_ipc(
+    avro_file: pathlib.Path,
+    ipc_dirs: list[pathlib.Path],
+    reader: Reader = _read_avro_sync,
+) -> pathlib.Path:
+    """Read an Avro file and write it as uncompressed Arrow IPC for the parent to mmap
+
+    The file goes to the first dir with room for it, so a small /dev/shm (64 MB in
+    a default Docker container) spills to the disk instead of failing.
+
+    Args:
+        avro_file: Avro file to read
+        ipc_dirs: Dirs to write the IPC file into, by preference (see `_ipc_tmp_roots`)
+        reader: Function to read one Avro file
+
+    Returns:
+        pathlib.Path: Path of the written IPC file
+    """
+    df = reader(avro_file)
+    size = df.estimated_size()
+    for ipc_dir in ipc_dirs[:-1]:
+        stat = os.statvfs(ipc_dir)
+        if stat.f_bavail * stat.f_frsize < size:
+            continue
+        ipc_path = ipc_dir / f"{avro_file.stem}.arrow"
+        try:
+            df.write_ipc(ipc_path, compression="uncompressed")
+            return ipc_path
+        except OSError:
+            # filled up by the other workers meanwhile
+            ipc_path.unlink(missing_ok=True)
+    ipc_path = ipc_dirs[-1] / f"{avro_file.stem}.arrow"
+    df.write_ipc(ipc_path, compression="uncompressed")
+    return ipc_path
+
+
+def _load_ipc(ipc_path: pathlib.Path) -> pl.DataFrame:
+    """Memory-map an IPC file written by `_read_avro_to_ipc` without copying
+
+    The file is unlinked right away; the mapping keeps the pages alive until the
+    DataFrame is dropped.
+    """
+    df = pl.read_ipc(ipc_path, memory_map=True, rechunk=False)
+    ipc_path.unlink()
+    return df
+
+
+def _ipc_tmp_roots() -> list[pathlib.Path | None]:
+    """Return /dev/shm when it exists so IPC files never touch the disk, then the
+    default temp dir for the files that do not fit in it"""
+    shm = pathlib.Path("/dev/shm")
+    return [shm, None] if shm.is_dir() else [None]
+
+
 @sync_timed()
-def _run_benchmarking_v1(save_dir: pathlib.Path) -> list[pl.DataFrame]:
+def _run_benchmarking_v1(
+    save_dir: pathlib.Path, reader: Reader = _read_avro_sync
+) -> list[pl.DataFrame]:
     """Run the benchmarking to read Avro files by synchronous way
 
     Args:
         save_dir: Save dir
+        reader: Function to read one Avro file
 
     Returns:
         list[pl.DataFrame]: List of DataFrames
     """
     avro_files = sorted(list(save_dir.glob("*.avro")))
-    dfs = [_read_avro_sync(avro_file) for avro_file in avro_files]
+    dfs = [reader(avro_file) for avro_file in avro_files]
     return dfs
 
 
 @async_timed()
-async def _run_benchmarking_v2(save_dir: pathlib.Path) -> list[pl.DataFrame]:
+async def _run_benchmarking_v2(
+    save_dir: pathlib.Path,
+    transfer: Literal["pickle", "ipc"] = "pickle",
+    reader: Reader = _read_avro_sync,
+    max_workers: int = 7,
+    max_tasks_per_child: int | None = 5,
+    start_method: StartMethod | None = None,
+    warm_pool: bool = False,
+) -> list[pl.DataFrame]:
     """Run the benchmarking to read Avro files by async way
 
     Args:
         save_dir: Save dir
+        transfer: "pickle" returns each DataFrame through the pool; "ipc" makes the
+            workers write Arrow IPC files to tmpfs (or to the disk when it is full)
+            which the parent memory-maps
+        reader: Function to read one Avro file
+        max_workers: Number of processes
+        max_tasks_per_child: Tasks a worker process runs before it is replaced
+        start_method: multiprocessing start method
+        warm_pool: Use the persistent pre-warmed process pool
 
     Returns:
         list[pl.DataFrame]: List of DataFrames
     """
 
     avro_files = sorted(list(save_dir.glob("*.avro")))
-    with ProcessPoolExecutor(max_workers=7, max_tasks_per_child=5) as pool:
+    with _make_process_pool(
+        max_workers, max_tasks_per_child, start_method, warm_pool
+    ) as pool:
         loop = asyncio.get_event_loop()
+        if transfer == "pickle":
+            call_coros = [
+                loop.run_in_executor(pool, reader, avro_file)
+                for avro_file in avro_files
+            ]
+            dfs = await asyncio.gather(*call_coros)
+        elif transfer == "ipc":
+            with contextlib.ExitStack() as stack:
+                ipc_dirs = [
+                    pathlib.Path(
+                        stack.enter_context(tempfile.TemporaryDirectory(dir=root))
+                    )
+                    for root in _ipc_tmp_roots()
+                ]
+
+                async def read_to_ipc(avro_file: pathlib.Path) -> pl.DataFrame:
+                    ipc_path = await loop.run_in_executor(
+                        pool, _read_avro_to_ipc, avro_file, ipc_dirs, reader
+                    )
+                    # map and unlink each file as soon as it is written
+                    return _load_ipc(ipc_path)
+
+                dfs = await asyncio.gather(
+                    *[read_to_ipc(avro_file) for avro_file in avro_files]
+                )
+        else:
+            raise ValueError(f"Invalid transfer: {transfer}")
+    return dfs
+
+
+@async_timed()
+async def _run_benchmarking_v3(
+    save_dir: pathlib.Path, max_workers: int = 7, reader: Reader = _read_avro_sync
+) -> list[pl.DataFrame]:
+    """Run the benchmarking to read Avro files by thread pool
+
+    Polars releases the GIL while decoding, so threads read in parallel and the
+    DataFrames need not be pickled back to the parent.
+
+    Args:
+        save_dir: Save dir
+        max_workers: Number of threads
+        reader: Function to read one Avro file
+
+    Returns:
+        list[pl.DataFrame]: List of DataFrames
+    """
+    avro_files = sorted(list(save_dir.glob("*.avro")))
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        loop = asyncio.get_running_loop()
         call_coros = [
-            loop.run_in_executor(pool, _read_avro_sync, avro_file)
-            for avro_file in avro_files
+            loop.run_in_executor(pool, reader, avro_file) for avro_file in avro_files
         ]
         dfs = await asyncio.gather(*call_coros)
     return dfs
 
 
+@async_timed()
+async def _run_benchmarking_v4(
+    save_dir: pathlib.Path,
+    max_workers: int = 7,
+    max_tasks_per_child: int | None = 5,
+    start_method: StartMethod | None = None,
+    warm_pool: bool = False,
+    threads_per_worker: int = 4,
+    reader: Reader = _read_avro_sync,
+) -> list[pl.DataFrame]:
+    """Run the benchmarking to read Avro files by N processes x M threads
+
+    Files are split into batches of `threads_per_worker`, and each worker process
+    reads its batch with its own thread pool.
+
+    Args:
+        save_dir: Save dir
+        max_workers: Number of processes
+        max_tasks_per_child: Batches a worker process runs before it is replaced
+        start_method: multiprocessing start method
+        warm_pool: Use the persistent pre-warmed process pool
+        threads_per_worker: Number of threads in each worker process
+        reader: Function to read one Avro file
+
+    Returns:
+        list[pl.DataFrame]: List of DataFrames
+    """
+    avro_files = sorted(list(save_dir.glob("*.avro")))
+    batches = [
+        avro_files[i : i + threads_per_worker]
+        for i in range(0, len(avro_files), threads_per_worker)
+    ]
+    with _make_process_pool(
+        max_workers, max_tasks_per_child, start_method, warm_pool
+    ) as pool:
+        loop = asyncio.get_running_loop()
+        call_coros = [
+            loop.run_in_executor(
+                pool, _read_avro_batch_threaded, batch, threads_per_worker, reader
+            )
+            for batch in batches
+        ]
+        results = await asyncio.gather(*call_coros)
+    return [df for dfs in results for df in dfs]
+
+
+def _bench_transfer(save_dir: pathlib.Path, repeats: int) -> None:
+    """Benchmark pickle vs. memory-mapped Arrow IPC result transfer of v2
+
+    Args:
+        save_dir: Save dir
+        repeats: Number of runs per transfer
+    """
+    elapsed: dict[str, list[float]] = {"pickle": [], "ipc": []}
+    for _ in range(repeats):
+        for transfer in elapsed:
+            start = time.perf_counter()
+            dfs = asyncio.run(_run_benchmarking_v2(save_dir, transfer=transfer))
+            elapsed[transfer].append(time.perf_counter() - start)
+            del dfs
+
+    for transfer, times in elapsed.items():
+        logger.info(
+            f"{transfer:>6} | min {min(times):.4f}s"
+            f" | median {statistics.median(times):.4f}s | runs {len(times)}"
+        )
+
+
+def _time_spawn(
+    max_workers: int,
+    max_tasks_per_child: int | None,
+    start_method: StartMethod | None,
+    warm_pool: bool,
+) -> float:
+    """Seconds from asking for a pool until all its workers can run a task"""
+    start = time.perf_counter()
+    with _make_process_pool(
+        max_workers, max_tasks_per_child, start_method, warm_pool
+    ) as pool:
+        spawn_workers(pool, max_workers)
+        return time.perf_counter() - start
+
+
+async def _time_first_result(
+    save_dir: pathlib.Path,
+    max_workers: int,
+    max_tasks_per_child: int | None,
+    start_method: StartMethod | None,
+    warm_pool: bool,
+) -> tuple[float, float]:
+    """Read all Avro files like v2 and time the first and the last frame
+
+    Returns:
+        tuple[float, float]: Seconds from asking for a pool to the first frame and
+            to the last one
+    """
+    avro_files = sorted(save_dir.glob("*.avro"))
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    first = None
+    with _make_process_pool(
+        max_workers, max_tasks_per_child, start_method, warm_pool
+    ) as pool:
+        futures = [
+            loop.run_in_executor(pool, _read_avro_sync, avro_file)
+            for avro_file in avro_files
+        ]
+        for fut in asyncio.as_completed(futures):
+            await fut
+            if first is None:
+                first = time.perf_counter() - start
+        total = time.perf_counter() - start
+    assert first is not None, f"No Avro files in {save_dir}"
+    return first, total
+
+
+def _bench_pool(
+    save_dir: pathlib.Path,
+    max_workers: int,
+    repeats: int,
+    max_tasks_per_child: int | None,
+    start_method: StartMethod | None,
+) -> None:
+    """Benchmark worker spawn cost and time-to-first-result, fresh vs. warm pools
+
+    The fresh pool is created for every run as v2 does; the warm pool is created
+    by the first run and reused by the others.
+
+    Args:
+        save_dir: Save dir
+        max_workers: Number of processes
+        repeats: Number of runs per pool
+        max_tasks_per_child: Tasks a worker process runs before it is replaced
+            (fresh pool only)
+        start_method: multiprocessing start method (fresh pool only)
+    """
+    spawn: dict[str, list[float]] = {"fresh": [], "warm": []}
+    first: dict[str, list[float]] = {"fresh": [], "warm": []}
+    total: dict[str, list[float]] = {"fresh": [], "warm": []}
+    for _ in range(repeats):
+        for mode in spawn:
+            warm_pool = mode == "warm"
+            spawn[mode].append(
+                _time_spawn(max_workers, max_tasks_per_child, start_method, warm_pool)
+            )
+            ttfr, elapsed = asyncio.run(
+                _time_first_result(
+                    save_dir, max_workers, max_tasks_per_child, start_method, warm_pool
+                )
+            )
+            first[mode].append(ttfr)
+            total[mode].append(elapsed)
+
+    # the first warm spawn is the one-off cost of creating the warm pool
+    logger.info(f"  warm | create pool {spawn['warm'].pop(0):.4f}s")
+    for mode in spawn:
+        logger.info(
+            f"{mode:>6} | spawn median {statistics.median(spawn[mode]):.4f}s"
+            f" | first result median {statistics.median(first[mode]):.4f}s"
+            f" | total median {statistics.median(total[mode]):.4f}s"
+            f" | runs {repeats}"
+        )
+
+
+@async_timed()
+async def _run_benchmarking_stream(
+    save_dir: pathlib.Path,
+    max_in_flight: int = 8,
+    on_frame: Callable[[pl.DataFrame], None] | None = None,
+    reader: Reader = _read_avro_sync,
+    max_workers: int = 7,
+    max_tasks_per_child: int | None = 5,
+    start_method: StartMethod | None = None,
+    warm_pool: bool = False,
+) -> tuple[int, pl.DataFrame]:
+    """Run the benchmarking to read Avro files by streaming way
+
+    Frames are consumed in completion order and at most `max_in_flight` files are
+    submitted to the pool at once, so only that many decoded frames can wait to be
+    consumed. Without `on_frame`, each frame is appended in place to one DataFrame
+    (no intermediate list, no final `pl.concat` copy).
+
+    Args:
+        save_dir: Save dir
+        max_in_flight: Max number of decoded-but-unconsumed frames
+        on_frame: Callback to hand each frame to instead of accumulating it
+        reader: Function to read one Avro file
+        max_workers: Number of processes
+        max_tasks_per_child: Tasks a worker process runs before it is replaced
+        start_method: multiprocessing start method
+        warm_pool: Use the persistent pre-warmed process pool
+
+    Returns:
+        tuple[int, pl.DataFrame]: Number of files read and the accumulated DataFrame
+            (empty if `on_frame` is given)
+    """
+    if max_in_flight < 1:
+        raise ValueError(f"max_in_flight must be >= 1, got {max_in_flight}")
+
+    avro_files = iter(sorted(save_dir.glob("*.avro")))
+    acc = pl.DataFrame()
+    num_files = 0
+    with _make_process_pool(
+        max_workers, max_tasks_per_child, start_method, warm_pool
+    ) as pool:
+        loop = asyncio.get_running_loop()
+        pending: set[asyncio.Future[pl.DataFrame]] = set()
+
+        def submit_next() -> None:
+            avro_file = next(avro_files, None)
+            if avro_file is not None:
+                pending.add(loop.run_in_executor(pool, reader, avro_file))
+
+        for _ in range(max_in_flight):
+            submit_next()
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for fut in done:
+                df = fut.result()
+                num_files += 1
+                if on_frame is not None:
+                    on_frame(df)
+                elif acc.width == 0:
+                    acc = df
+                else:
+                    acc.vstack(df, in_place=True)
+                del df
+                submit_next()
+    return num_files, acc
+
+
+def _percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile of `values` (q in [0, 100])"""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(len(ordered) * q / 100))
+    return ordered[rank - 1]
+
+
+def _descendants(pid: int) -> set[int]:
+    """Return the pids of every live descendant of `pid`, from /proc"""
+    parents: dict[int, int] = {}
+    for stat in pathlib.Path("/proc").glob("[0-9]*/stat"):
+        try:
+            # the command name in parentheses may contain spaces
+            fields = stat.read_text().rpartition(")")[2].split()
+        except OSError:
+            continue  # exited while scanning
+        parents[int(stat.parent.name)] = int(fields[1])
+    found: set[int] = set()
+    frontier = {pid}
+    while frontier:
+        frontier = {child for child, parent in parents.items() if parent in frontier}
+        found |= frontier
+    return found
+
+
+def _peak_rss_kib(pid: int) -> int:
+    """Return the peak resident set size (VmHWM) of a live process in KiB"""
+    try:
+        for line in pathlib.Path(f"/proc/{pid}/status").read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+@contextlib.contextmanager
+def _sample_worker_rss(interval: float = 0.05) -> Iterator[dict[int, int]]:
+    """Sample the peak RSS of every descendant process while the block runs
+
+    `RUSAGE_CHILDREN` only covers reaped children: workers of a warm pool are
+    still alive when a case ends, and forkserver workers are reaped by the
+    forkserver, not by us. Polling /proc sees them while they run. A worker that
+    lives less than `interval` may be missed. Yields an empty dict where /proc
+    is not available.
+
+    Args:
+        interval: Seconds between samples
+
+    Yields:
+        dict[int, int]: Peak RSS in KiB per pid, filled in until the block exits
+    """
+    peaks: dict[int, int] = {}
+    if not pathlib.Path("/proc/self/status").exists():
+        yield peaks
+        return
+
+    def sample() -> None:
+        for pid in _descendants(os.getpid()):
+            peaks[pid] = max(peaks.get(pid, 0), _peak_rss_kib(pid))
+
+    stop = threading.Event()
+
+    def poll() -> None:
+        while not stop.wait(interval):
+            sample()
+
+    thread = threading.Thread(target=poll, daemon=True)
+    thread.start()
+    try:
+        yield peaks
+    finally:
+        stop.set()
+        thread.join()
+        sample()  # warm workers are still alive here
+
+
+def _bench_case(
+    version: Version,
+    save_dir: pathlib.Path,
+    num_files: int,
+    max_workers: int,
+    warmup: int,
+    repeats: int,
+    max_tasks_per_child: int | None,
+    start_method: StartMethod | None,
+    warm_pool: bool,
+) -> dict[str, Any]:
+    """Run one benchmark case; meant to run in a fresh process
+
+    Running each case in its own process makes the `ru_maxrss` high-water marks
+    belong to this case only. Worker peaks are sampled while the case runs, so
+    they include workers that are still alive or were never our children.
+
+    Args:
+        version: version to run
+        save_dir: Save dir
+        num_files: Number of Avro files to read (the first ones in sorted order)
+        max_workers: Number of processes or threads
+        warmup: Warmup runs
+        repeats: Measured runs
+        max_tasks_per_child: Tasks a worker process runs before it is replaced
+        start_method: multiprocessing start method
+        warm_pool: Use the persistent pre-warmed process pool
+
+    Returns:
+        dict[str, Any]: Report row
+    """
+    avro_files = sorted(save_dir.glob("*.avro"))[:num_files]
+    if len(avro_files) < num_files:
+        raise ValueError(
+            f"Need {num_files} Avro files in {save_dir}, got {len(avro_files)}"
+        )
+    num_bytes = sum(avro_file.stat().st_size for avro_file in avro_files)
+
+    times: list[float] = []
+    num_records = 0
+    with (
+        tempfile.TemporaryDirectory() as tmp_dir,
+        _sample_worker_rss() as worker_rss_kib,
+    ):
+        case_dir = pathlib.Path(tmp_dir)
+        for avro_file in avro_files:
+            (case_dir / avro_file.name).symlink_to(avro_file.resolve())
+        for i in range(warmup + repeats):
+            start = time.perf_counter()
+            _, df = _read_avro_dir(
+                version=version,
+                save_dir=case_dir,
+                max_workers=max_workers,
+                max_tasks_per_child=max_tasks_per_child,
+                start_method=start_method,
+                warm_pool=warm_pool,
+            )
+            elapsed = time.perf_counter() - start
+            num_records = len(df)
+            del df
+            if i >= warmup:
+                times.append(elapsed)
+
+    median = statistics.median(times)
+    return {
+        "version": version,
+        "max_workers": max_workers,
+        "num_files": num_files,
+        "num_records": num_records,
+        "num_bytes": num_bytes,
+        "repeats": repeats,
+        "min_s": min(times),
+        "median_s": median,
+        "p95_s": _percentile(times, 95),
+        "records_per_s": num_records / median,
+        "mb_per_s": num_bytes / 1e6 / median,
+        # ru_maxrss is in KiB on Linux. The worker figure is the peak of the
+        # largest single worker, sampled or reaped, not the total of the pool
+        "peak_rss_parent_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "peak_rss_largest_worker_mb": max(
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+            *worker_rss_kib.values(),
+        )
+        / 1024,
+    }
+
+
+def _bench(
+    save_dir: pathlib.Path,
+    versions: list[Version],
+    workers: list[int],
+    file_counts: list[int],
+    warmup: int,
+    repeats: int,
+    max_tasks_per_child: int | None,
+    start_method: StartMethod | None,
+    warm_pool: bool,
+    output: pathlib.Path,
+) -> None:
+    """Run the benchmark matrix and write the report as JSON or CSV
+
+    Args:
+        save_dir: Save dir
+        versions: Versions to run
+        workers: Worker counts to run (v1 always runs with 1)
+        file_counts: Number of Avro files to read per run
+        warmup: Warmup runs per case
+        repeats: Measured runs per case
+        max_tasks_per_child: Tasks a worker process runs before it is replaced
+        start_method: multiprocessing start method
+        warm_pool: Use the persistent pre-warmed process pool
+        output: Report path (.json or .csv)
+    """
+    if output.suffix not in (".json", ".csv"):
+        raise ValueError(f"Unsupported report format: {output}")
+
+    rows: list[dict[str, Any]] = []
+    for num_files in file_counts:
+        for version in versions:
+            # v1 is serial, so it runs once with a single worker
+            for max_workers in [1] if version == "v1" else workers:
+                # Each case runs in a fresh interpreter so peak RSS is per case
+                with ProcessPoolExecutor(
+                    max_workers=1, mp_context=get_context("spawn")
+                ) as pool:
+                    row = pool.submit(
+                        _bench_case,
+                        version,
+                        save_dir,
+                        num_files,
+                        max_workers,
+                        warmup,
+                        repeats,
+                        max_tasks_per_child,
+                        start_method,
+                        warm_pool,
+                    ).result()
+                logger.info(
+                    f"{version:>6} | workers {max_workers:>3} | files {num_files:>5}"
+                    f" | min {row['min_s']:.4f}s | median {row['median_s']:.4f}s"
+                    f" | p95 {row['p95_s']:.4f}s | {row['mb_per_s']:.1f} MB/s"
+                )
+                rows.append(row)
+
+    if not rows:
+        logger.warning("No benchmark case selected, no report written")
+        return
+    output.parent.mkdir(parents=True, exist_ok=True)
+    if output.suffix == ".json":
+        report = {
+            "created_at": datetime.datetime.now(datetime.UTC).isoformat(),
+            "python": platform.python_version(),
+            "polars": pl.__version__,
+            "platform": platform.platform(),
+            "warmup": warmup,
+            "results": rows,
+        }
+        output.write_text(json.dumps(report, indent=2))
+    else:
+        with open(output, "w", newline="") as f:
+            csv_writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            csv_writer.writeheader()
+            csv_writer.writerows(rows)
+    logger.info(f"Wrote {len(rows)} results to {output}")
+
+
 def main():
+    REGISTRY.dump_at_exit()
     CliApp.run(Cmd, cli_cmd_method_name="cli_cmd")
 
 
@@ -0,0 +1,52 @@
+import asyncio
+import functools
+import time
+import tracemalloc
+from collections.abc import Callable, Coroutine
+from typing import Any
+
+from bounded import BoundedTaskGroup
+
+NUM_JOBS = 100_000
+LIMIT = 1_000
+
+
+async def job(seconds: float) -> None:
+    await asyncio.sleep(seconds)
+
+
+async def run_gather(num_jobs: int) -> None:
+    await asyncio.gather(*[job(0.001) for _ in range(num_jobs)])
+
+
+async def run_task_group(num_jobs: int) -> None:
+    async with asyncio.TaskGroup() as tg:
+        for _ in range(num_jobs):
+            tg.create_task(job(0.001))
+
+
+async def run_bounded_task_group(num_jobs: int) -> None:
+    async with BoundedTaskGroup(LIMIT) as tg:
+        tg.feed(functools.partial(job, 0.001) for _ in range(num_jobs))
+
+
+def measure(run: Callable[[int], Coroutine[Any, Any, None]], num_jobs: int) -> None:
+    tracemalloc.start()
+    start = time.perf_counter()
+    asyncio.run(run(num_jobs))
+    end = time.perf_counter()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{run.__name__}: {num_jobs / (end - start):,.0f} jobs/s,"
+        f" peak traced memory {peak / 1024 / 1024:.1f} MiB"
+    )
+
+
+def main():
+    for run in (run_gather, run_task_group, run_bounded_task_group):
+        measure(run, NUM_JOBS)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+import asyncio
+import heapq
+import itertools
+from collections.abc import AsyncIterable, Callable, Coroutine, Iterable
+from dataclasses import dataclass, field
+from typing import Any, Generic, TypeVar
+
+T = TypeVar("T")
+
+JobFactory = Callable[[], Coroutine[Any, Any, T]]
+
+
+@dataclass
+class Job(Generic[T]):
+    """Handle of a job submitted to a `BoundedTaskGroup`.
+
+    The coroutine is created only when the job starts, so a pending job costs a
+    small object instead of a task and a coroutine frame.
+
+    Attributes:
+        factory: Zero-argument callable returning the coroutine to run.
+        priority: Jobs with a lower value start first.
+        weight: Share of the group's capacity the job uses while running.
+        task: The task running the job, once started.
+    """
+
+    factory: JobFactory[T]
+    priority: int = 0
+    weight: float = 1.0
+    task: asyncio.Task[T] | None = field(default=None, repr=False)
+
+    def done(self) -> bool:
+        return self.task is not None and self.task.done()
+
+    def result(self) -> T:
+        """Return the result, like `asyncio.Task.result`.
+
+        Raises:
+            asyncio.CancelledError: If the job never started because the group
+                was aborted.
+        """
+        if self.task is None:
+            raise asyncio.CancelledError("Job was never started")
+        return self.task.result()
+
+
+class BoundedTaskGroup:
+    """A TaskGroup that runs at most `limit` jobs at a time.
+
+    Jobs wait in a priority queue and start when both a slot and enough capacity
+    are free. They can be submitted one by one, or fed lazily from an iterable or
+    async iterable, which is only advanced while fewer than `limit` jobs wait. The
+    group is a wrapper of `asyncio.TaskGroup` and keeps its semantics: when a job
+    fails, running jobs are cancelled, waiting jobs never start, and the errors
+    are raised in an ExceptionGroup when the block exits.
+
+    Args:
+        limit: Max number of jobs running at once.
+        capacity: Max total weight of the jobs running at once (`limit` if None).
+    """
+
+    def __init__(self, limit: int, capacity: float | None = None) -> None:
+        if limit < 1:
+            raise ValueError(f"limit must be >= 1, got {limit}")
+        self.limit = limit
+        self.capacity = float(limit) if capacity is None else capacity
+        self._tg = asyncio.TaskGroup()
+        self._queue: list[tuple[int, int, Job]] = []
+        self._seq = itertools.count()
+        self._running = 0
+        self._used = 0.0
+        self._closed = False
+        self._room = asyncio.Event()
+
+    async def __aenter__(self) -> "BoundedTaskGroup":
+        await self._tg.__aenter__()
+        return self
+
+    async def __aexit__(self, et, exc, tb) -> None:
+        if et is not None:
+            self._closed = True
+        try:
+            await self._tg.__aexit__(et, exc, tb)
+        finally:
+            self._closed = True
+            self._queue.clear()
+
+    @property
+    def running(self) -> int:
+        return self._running
+
+    @property
+    def waiting(self) -> int:
+        return len(self._queue)
+
+    def submit(
+        self, factory: JobFactory[T], priority: int = 0, weight: float = 1.0
+    ) -> Job[T]:
+        """Queue a job and start it as soon as there is room.
+
+        Args:
+            factory: Zero-argument callable returning the coroutine to run, e.g.
+                `functools.partial(sleep, job_id=1, seconds=1)`.
+            priority: Jobs with a lower value start first; ties start in order.
+            weight: Share of `capacity` the job uses while running.
+
+        Returns:
+            The handle of the job.
+        """
+        if self._closed:
+            raise RuntimeError("BoundedTaskGroup is shutting down")
+        if not 0 < weight <= self.capacity:
+            raise ValueError(f"weight must be in (0, {self.capacity}], got {weight}")
+        job = Job(factory, priority, weight)
+        heapq.heappush(self._queue, (priority, next(self._seq), job))
+        self._dispatch()
+        return job
+
+    def feed(
+        self,
+        factories: Iterable[JobFactory] | AsyncIterable[JobFactory],
+        priority: int = 0,
+        weight: float = 1.0,
+    ) -> None:
+        """Submit jobs from an iterable as room frees up.
+
+        A feeder task in the group pulls the next factory only while fewer than
+        `limit` jobs wait, so the iterable can be much larger than memory allows
+        for tasks. Use `submit` to keep the handles; fed jobs should record their
+        own results.
+
+        Args:
+            factories: Zero-argument callables returning coroutines.
+            priority: Priority of every fed job.
+            weight: Weight of every fed job.
+        """
+        self._tg.create_task(self._feed(factories, priority, weight))
+
+    async def _feed(
+        self,
+        factories: Iterable[JobFactory] | AsyncIterable[JobFactory],
+        priority: int,
+        weight: float,
+    ) -> None:
+        try:
+            if isinstance(factories, AsyncIterable):
+                async for factory in factories:
+                    await self._wait_for_room()
+                    if self._closed:
+                        return
+                    self.submit(factory, priority, weight)
+            else:
+                for factory in factories:
+                    await self._wait_for_room()
+                    if self._closed:
+                        return
+                    self.submit(factory, priority, weight)
+        except BaseException:
+            self._closed = True
+            raise
+
+    async def _wait_for_room(self) -> None:
+        while len(self._queue) >= self.limit and not self._closed:
+            self._room.clear()
+            await self._room.wait()
+
+    def _dispatch(self) -> None:
+        """Start waiting jobs while there is room."""
+        while self._queue and not self._closed:
+            job = self._queue[0][2]
+            if self._running >= self.limit or self._used + job.weight > self.capacity:
+                return
+            heapq.heappop(self._queue)
+            coro = self._run(job)
+            try:
+                job.task = self._tg.create_task(coro)
+            except RuntimeError:
+                # the TaskGroup is aborting (e.g. the parent task was cancelled)
+                coro.close()
+                self._closed = True
+                return
+            self._running += 1
+            self._used += job.weight
+            self._room.set()
+
+    async def _run(self, job: Job[T]) -> T:
+        try:
+            return await job.factory()
+        except Exception:
+            # the TaskGroup aborts on this error: do not start more jobs
+            self._closed = True
+            raise
+        finally:
+            self._running -= 1
+            self._used -= job.weight
+            self._dispatch()
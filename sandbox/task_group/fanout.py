@@ -0,0 +1,205 @@
+import asyncio
+import functools
+import math
+import random
+import time
+from collections import deque
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from typing import Generic, TypeVar
+
+from bounded import BoundedTaskGroup, JobFactory
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Retry failed attempts with exponential backoff and full jitter.
+
+    The n-th retry waits a random time in [0, min(max_delay, base_delay * 2**n)].
+
+    Attributes:
+        attempts: Max number of attempts per job, including the first.
+        base_delay: Backoff before the first retry, in seconds.
+        max_delay: Upper bound of the backoff, in seconds.
+        retry_on: Exception types that are retried; others fail the job at once.
+    """
+
+    attempts: int = 3
+    base_delay: float = 0.1
+    max_delay: float = 5.0
+    retry_on: tuple[type[Exception], ...] = (Exception,)
+
+    def backoff(self, retry: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**retry))
+
+
+@dataclass(frozen=True)
+class HedgePolicy:
+    """Launch a duplicate of an attempt that runs longer than usual.
+
+    Attributes:
+        quantile: Latency quantile (in [0, 100]) after which to hedge.
+        min_samples: Successful attempts to observe before hedging at all.
+        window: Number of recent latencies the quantile is computed over.
+    """
+
+    quantile: float = 95.0
+    min_samples: int = 20
+    window: int = 1000
+
+
+@dataclass
+class Outcome(Generic[T]):
+    """The result or the exception of one job.
+
+    Attributes:
+        result: The return value, if the job succeeded.
+        exception: The last exception, if the job failed.
+        attempts: Number of attempts made.
+        hedged: Whether a duplicate was launched for any attempt.
+        latency: Seconds from the first attempt to the outcome.
+    """
+
+    result: T | None = None
+    exception: BaseException | None = None
+    attempts: int = 0
+    hedged: bool = False
+    latency: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.exception is None
+
+
+@dataclass
+class FanOutStats:
+    """Counters of a `FanOut` runner."""
+
+    jobs: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    retries: int = 0
+    hedges: int = 0
+    hedge_wins: int = 0
+    latencies: deque[float] = field(default_factory=deque, repr=False)
+
+
+class FanOut:
+    """Run jobs concurrently and collect every outcome.
+
+    Unlike `TaskGroup` a failing job does not cancel its siblings, and unlike
+    `gather` every result is kept next to the exceptions. Failed attempts are
+    retried according to `retry`. With `hedge`, an attempt still running after the
+    `hedge.quantile` latency of recent attempts gets a duplicate; the first to
+    succeed wins and the other is cancelled. Jobs must be safe to run more than
+    once when retries or hedging are enabled.
+
+    Args:
+        limit: Max number of jobs running at once.
+        retry: The retry policy (no retries if None).
+        hedge: The hedging policy (no hedging if None).
+    """
+
+    def __init__(
+        self,
+        limit: int = 100,
+        retry: RetryPolicy | None = None,
+        hedge: HedgePolicy | None = None,
+    ) -> None:
+        self.limit = limit
+        self.retry = retry or RetryPolicy(attempts=1)
+        self.hedge = hedge
+        self.stats = FanOutStats(
+            latencies=deque(maxlen=hedge.window if hedge is not None else 1)
+        )
+
+    async def run(self, factories: Iterable[JobFactory[T]]) -> list[Outcome[T]]:
+        """Run every job and return the outcomes in order.
+
+        Args:
+            factories: Zero-argument callables returning the coroutine of a job.
+                They are called once per attempt.
+
+        Returns:
+            The outcome of each job.
+        """
+        outcomes: list[Outcome[T]] = []
+        async with BoundedTaskGroup(self.limit) as tg:
+            for factory in factories:
+                outcome: Outcome[T] = Outcome()
+                outcomes.append(outcome)
+                tg.submit(functools.partial(self._run_job, factory, outcome))
+        return outcomes
+
+    async def _run_job(self, factory: JobFactory[T], outcome: Outcome[T]) -> None:
+        """Fill `outcome`; never raises except on cancellation."""
+        self.stats.jobs += 1
+        start = time.perf_counter()
+        for attempt in range(self.retry.attempts):
+            outcome.attempts += 1
+            try:
+                outcome.result = await self._attempt(factory, outcome)
+                outcome.exception = None
+                self.stats.succeeded += 1
+                break
+            except Exception as e:
+                outcome.exception = e
+                if (
+                    not isinstance(e, self.retry.retry_on)
+                    or attempt + 1 == self.retry.attempts
+                ):
+                    self.stats.failed += 1
+                    break
+                self.stats.retries += 1
+                await asyncio.sleep(self.retry.backoff(attempt))
+        outcome.latency = time.perf_counter() - start
+
+    async def _attempt(self, factory: JobFactory[T], outcome: Outcome[T]) -> T:
+        start = time.perf_counter()
+        delay = self._hedge_delay()
+        primary = asyncio.create_task(factory())
+        tasks = {primary}
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done:
+                    self.stats.hedges += 1
+                    outcome.hedged = True
+                    tasks.add(asyncio.create_task(factory()))
+            first_error: BaseException | None = None
+            while tasks:
+                done, tasks = await asyncio.wait(
+                    tasks, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.cancelled():
+                        # the job cancelled itself: a failure, not ours to propagate
+                        error: BaseException = RuntimeError("Job was cancelled")
+                    elif (exc := task.exception()) is not None:
+                        error = exc
+                    else:
+                        if task is not primary:
+                            self.stats.hedge_wins += 1
+                        self.stats.latencies.append(time.perf_counter() - start)
+                        return task.result()
+                    # keep the primary's error if both copies fail
+                    if first_error is None or task is primary:
+                        first_error = error
+            assert first_error is not None
+            raise first_error
+        finally:
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                await asyncio.wait(tasks)
+
+    def _hedge_delay(self) -> float | None:
+        """Return the latency quantile of recent attempts, if hedging applies."""
+        latencies = self.stats.latencies
+        if self.hedge is None or len(latencies) < self.hedge.min_samples:
+            return None
+        ordered = sorted(latencies)
+        rank = max(1, math.ceil(len(ordered) * self.hedge.quantile / 100))
+        return ordered[rank - 1]
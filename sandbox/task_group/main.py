@@ -1,4 +1,8 @@
 import asyncio
+import functools
+
+from bounded import BoundedTaskGroup
+from fanout import FanOut, RetryPolicy
 
 
 async def sleep(job_id: int, seconds: int, exception: bool = False) -> int:
@@ -44,10 +48,42 @@ async def run_by_task_group() -> None:
         print(f"Exception: {e.exceptions}")
 
 
+async def run_by_bounded_task_group() -> None:
+    try:
+        # at most 2 jobs run at once; job 3 (priority -1) starts before the fed jobs
+        async with BoundedTaskGroup(limit=2) as tg:
+            job1 = tg.submit(functools.partial(sleep, job_id=1, seconds=1))
+            job2 = tg.submit(functools.partial(sleep, job_id=2, seconds=2), priority=1)
+            job3 = tg.submit(functools.partial(sleep, job_id=3, seconds=3), priority=-1)
+            tg.feed(functools.partial(sleep, job_id=i, seconds=1) for i in range(4, 8))
+        print(f"{job1.result()=}")
+        print(f"{job2.result()=}")
+        print(f"{job3.result()=}")
+    except* Exception as e:
+        print(f"Exception: {e.exceptions}")
+
+
+async def run_by_fan_out() -> None:
+    # job 2 fails every attempt, but jobs 1 and 3 are not cancelled
+    fan_out = FanOut(retry=RetryPolicy(attempts=3, base_delay=0.5))
+    outcomes = await fan_out.run(
+        [
+            functools.partial(sleep, job_id=1, seconds=1),
+            functools.partial(sleep, job_id=2, seconds=2, exception=True),
+            functools.partial(sleep, job_id=3, seconds=3),
+        ]
+    )
+    for outcome in outcomes:
+        print(f"{outcome=}")
+    print(f"{fan_out.stats=}")
+
+
 def main():
     # asyncio.run(run_by_gather())
     asyncio.run(run_by_task_group())
     # asyncio.run(run_by_task())
+    # asyncio.run(run_by_bounded_task_group())
+    # asyncio.run(run_by_fan_out())
 
 
 if __name__ == "__main__":
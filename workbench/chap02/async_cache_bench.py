@@ -0,0 +1,50 @@
+import functools
+import time
+
+from loguru import logger
+from utils import async_lru_cache, run_async
+
+NUM_CALLS = 1_000_000
+
+
+@functools.lru_cache(maxsize=128)
+def sync_square(x: int) -> int:
+    return x * x
+
+
+@async_lru_cache(maxsize=128)
+async def async_square(x: int) -> int:
+    return x * x
+
+
+async def async_square_uncached(x: int) -> int:
+    return x * x
+
+
+async def main() -> None:
+    sync_square(3)
+    await async_square(3)
+
+    start = time.perf_counter()
+    for _ in range(NUM_CALLS):
+        sync_square(3)
+    sync_ns = (time.perf_counter() - start) / NUM_CALLS * 1e9
+
+    start = time.perf_counter()
+    for _ in range(NUM_CALLS):
+        await async_square_uncached(3)
+    await_ns = (time.perf_counter() - start) / NUM_CALLS * 1e9
+
+    start = time.perf_counter()
+    for _ in range(NUM_CALLS):
+        await async_square(3)
+    async_ns = (time.perf_counter() - start) / NUM_CALLS * 1e9
+
+    logger.info(f"functools.lru_cache hit: {sync_ns:.0f} ns")
+    logger.info(f"await of an uncached coroutine: {await_ns:.0f} ns")
+    logger.info(f"async_lru_cache hit: {async_ns:.0f} ns")
+    logger.info(async_square.stats())
+
+
+if __name__ == "__main__":
+    run_async(main())
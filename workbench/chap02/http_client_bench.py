@@ -0,0 +1,34 @@
+import time
+
+from loguru import logger
+from utils import HttpClient, StandInServer, run_async
+
+HOST = "127.0.0.1"
+
+
+async def main() -> None:
+    num_requests = 5_000
+    server = StandInServer(latency=0.05)
+    async with server.serve(HOST) as port:
+        urls = [f"http://localhost:{port}/endpoint/{i}" for i in range(num_requests)]
+        async with HttpClient(limit=500, limit_per_host=100) as client:
+            start = time.perf_counter()
+            responses = await client.fetch_all(urls)
+            end = time.perf_counter()
+
+        errors = [r for r in responses if isinstance(r, BaseException)]
+        ok = sum(
+            1
+            for url, r in zip(urls, responses)
+            if not isinstance(r, BaseException) and url.endswith(r.body.decode())
+        )
+        logger.info(
+            f"{ok}/{num_requests} ok, {len(errors)} errors in {end - start:.4f}s"
+            f" | client opened {client.connections_opened} connections,"
+            f" {client.dns_lookups} DNS lookups"
+            f" | server accepted {server.connections} connections"
+        )
+
+
+if __name__ == "__main__":
+    run_async(main())
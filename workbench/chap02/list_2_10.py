@@ -1,6 +1,6 @@
 import asyncio
 
-from utils import delay
+from utils import delay, run_async
 
 
 async def hello_every_second():
@@ -26,5 +26,5 @@ async def main_v2():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
-    # asyncio.run(main_v2())
+    run_async(main())
+    # run_async(main_v2())
@@ -1,7 +1,7 @@
 import asyncio
 from asyncio import CancelledError
 
-from utils import delay
+from utils import delay, run_async
 
 
 async def main():
@@ -23,4 +23,4 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    run_async(main())
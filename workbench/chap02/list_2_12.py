@@ -1,6 +1,6 @@
 import asyncio
 
-from utils import delay
+from utils import DeadlineExceeded, deadline, delay, run_async
 
 
 async def main():
@@ -13,4 +13,23 @@ async def main():
         print(f"Was the task cancelled? {delay_task.cancelled()}")
 
 
-asyncio.run(main())
+async def main_v2():
+    # Tasks created under the deadline inherit it, so delay(2) stops at 1 second
+    with deadline(1):
+        delay_task = asyncio.create_task(delay(2))
+    try:
+        result = await delay_task
+        print(result)
+    except DeadlineExceeded:
+        print("Got a deadline exceeded!")
+        # delay(3) is not even started: the deadline has already passed
+        with deadline(1):
+            await asyncio.sleep(1)
+            try:
+                await delay(3)
+            except DeadlineExceeded:
+                print("Shed delay(3) before it started")
+
+
+run_async(main())
+# run_async(main_v2())
@@ -1,7 +1,7 @@
 import asyncio
 
 from loguru import logger
-from utils import delay
+from utils import DeadlineExceeded, deadline, delay, run_async, shielded
 
 
 async def main():
@@ -17,4 +17,16 @@ async def main():
         logger.info(f"{result=} in except")
 
 
-asyncio.run(main())
+async def main_v2():
+    try:
+        async with deadline(5):
+            await delay(10)
+    except DeadlineExceeded:
+        logger.warning("Request took longer than five seconds, cleaning up")
+        # cleanup runs without the expired deadline and survives cancellation
+        result = await shielded(delay(1), grace=2)
+        logger.info(f"{result=} in cleanup")
+
+
+run_async(main())
+# run_async(main_v2())
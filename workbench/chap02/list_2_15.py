@@ -2,6 +2,7 @@ import asyncio
 from asyncio import Future
 
 from loguru import logger
+from utils import coalesce, run_async
 
 
 def make_request() -> Future:
@@ -23,4 +24,25 @@ async def main() -> None:
     logger.info(value)
 
 
-asyncio.run(main())
+backend_calls = 0
+
+
+@coalesce(ttl=5, stale_ttl=30)
+async def get_value(key: str) -> int:
+    global backend_calls
+    backend_calls += 1
+    await asyncio.sleep(1)
+    return 42
+
+
+async def main_v2() -> None:
+    # 1000 concurrent callers of the same key share one Future and one backend call
+    values = await asyncio.gather(*[get_value("answer") for _ in range(1000)])
+    logger.info(f"{len(values)} values from {backend_calls} backend call(s)")
+    # the cached value answers later callers without a backend call
+    logger.info(await get_value("answer"))
+    logger.info(get_value.stats())
+
+
+run_async(main())
+# run_async(main_v2())
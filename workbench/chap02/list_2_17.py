@@ -1,10 +1,10 @@
 import asyncio
 
 from loguru import logger
-from utils import async_timed
+from utils import async_timed, run_async
 
 
-@async_timed()
+@async_timed(log=True)
 async def delay(delay_seconds: int) -> int:
     """delay function to sleep for a given number of seconds.
 
@@ -20,7 +20,7 @@ async def delay(delay_seconds: int) -> int:
     return delay_seconds
 
 
-@async_timed()
+@async_timed(log=True)
 async def main():
     task_one = asyncio.create_task(delay(2))
     task_two = asyncio.create_task(delay(3))
@@ -29,4 +29,4 @@ async def main():
     await task_two
 
 
-asyncio.run(main())
+run_async(main())
@@ -1,9 +1,9 @@
 import asyncio
 
-from utils import async_timed
+from utils import async_timed, run_async
 
 
-@async_timed()
+@async_timed(log=True)
 async def cpu_bound_work() -> int:
     counter = 0
     for i in range(100000000):
@@ -11,7 +11,7 @@ async def cpu_bound_work() -> int:
     return counter
 
 
-@async_timed()
+@async_timed(log=True)
 async def main():
     task_one = asyncio.create_task(cpu_bound_work())
     task_two = asyncio.create_task(cpu_bound_work())
@@ -19,4 +19,4 @@ async def main():
     await task_two
 
 
-asyncio.run(main())
+run_async(main())
@@ -1,15 +1,15 @@
 import asyncio
 
 import requests
-from utils import async_timed
+from utils import HttpClient, async_timed, run_async
 
 
-@async_timed()
+@async_timed(log=True)
 async def get_example_status() -> int:
     return requests.get("http://www.example.com").status_code
 
 
-@async_timed()
+@async_timed(log=True)
 async def main():
     task_1 = asyncio.create_task(get_example_status())
     task_2 = asyncio.create_task(get_example_status())
@@ -19,4 +19,22 @@ async def main():
     await task_3
 
 
-asyncio.run(main())
+@async_timed(log=True)
+async def get_example_status_v2(client: HttpClient) -> int:
+    return (await client.get("http://www.example.com")).status_code
+
+
+@async_timed(log=True)
+async def main_v2():
+    # The requests run concurrently and share the pooled connections
+    async with HttpClient() as client:
+        task_1 = asyncio.create_task(get_example_status_v2(client))
+        task_2 = asyncio.create_task(get_example_status_v2(client))
+        task_3 = asyncio.create_task(get_example_status_v2(client))
+        await task_1
+        await task_2
+        await task_3
+
+
+run_async(main())
+# run_async(main_v2())
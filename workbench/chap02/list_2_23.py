@@ -1,9 +1,9 @@
 import asyncio
 
-from utils import async_timed
+from utils import LoopMonitor, async_timed, run_async
 
 
-@async_timed()
+@async_timed(log=True)
 async def cpu_bound_work() -> int:
     counter = 0
     for i in range(100000000):
@@ -16,4 +16,13 @@ async def main() -> None:
     await task_one
 
 
-asyncio.run(main(), debug=True)
+async def main_v2() -> None:
+    # LoopMonitor finds the blocking coroutine without the cost of debug mode
+    async with LoopMonitor() as monitor:
+        task_one = asyncio.create_task(cpu_bound_work())
+        await task_one
+    monitor.dump()
+
+
+run_async(main(), debug=True)
+# run_async(main_v2())
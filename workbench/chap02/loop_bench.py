@@ -0,0 +1,109 @@
+import argparse
+import asyncio
+import os
+import time
+from collections.abc import Awaitable, Callable
+
+from loguru import logger
+from utils import LOOP_ENV, available_backends, delay, resolve_backend, run_async
+
+Bench = Callable[[int], Awaitable[None]]
+
+
+async def noop() -> None:
+    pass
+
+
+def noop_sync() -> None:
+    pass
+
+
+async def bench_create_task(n: int) -> None:
+    """Create `n` tasks of a no-op, and yield once to the loop so they finish."""
+    for _ in range(n):
+        asyncio.create_task(noop())
+    await asyncio.sleep(0)
+
+
+async def bench_delay_round_trip(n: int) -> None:
+    """Create a task of `delay(0)` and await it, one at a time."""
+    for _ in range(n):
+        await asyncio.create_task(delay(0))
+
+
+async def bench_gather(n: int) -> None:
+    await asyncio.gather(*[noop() for _ in range(n)])
+
+
+async def bench_task_group(n: int) -> None:
+    async with asyncio.TaskGroup() as tg:
+        for _ in range(n):
+            tg.create_task(noop())
+
+
+async def bench_to_thread(n: int) -> None:
+    """Dispatch a no-op to the default executor and await it, one at a time."""
+    for _ in range(n):
+        await asyncio.to_thread(noop_sync)
+
+
+BENCHES: dict[str, tuple[Bench, int]] = {
+    # name: (benchmark, divisor of the number of ops)
+    "create_task": (bench_create_task, 1),
+    "create_task+await delay(0)": (bench_delay_round_trip, 10),
+    "gather fan-out": (bench_gather, 1),
+    "TaskGroup fan-out": (bench_task_group, 1),
+    "to_thread round-trip": (bench_to_thread, 10),
+}
+
+
+async def run_benches(n: int, repeats: int) -> dict[str, float]:
+    """Run every benchmark and return the best ops/s of each."""
+    results: dict[str, float] = {}
+    for name, (bench, divisor) in BENCHES.items():
+        ops = n // divisor
+        await bench(min(ops, 1000))  # warm up
+        best = float("inf")
+        for _ in range(repeats):
+            start = time.perf_counter()
+            await bench(ops)
+            best = min(best, time.perf_counter() - start)
+        results[name] = ops / best
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Event loop micro-benchmarks")
+    parser.add_argument(
+        "--loop",
+        choices=["all", "asyncio", "uvloop"],
+        default=os.environ.get(LOOP_ENV, "all"),
+        help=f"Backend to run (default: ${LOOP_ENV}, else every available one)",
+    )
+    parser.add_argument("--tasks", type=int, default=100_000, help="Ops per run")
+    parser.add_argument("--repeats", type=int, default=3, help="Runs per benchmark")
+    args = parser.parse_args()
+
+    if args.loop == "all":
+        backends = available_backends()
+        if "uvloop" not in backends:
+            logger.warning(
+                "uvloop is not installed (uv sync --group uvloop), only asyncio runs"
+            )
+    else:
+        backends = [resolve_backend(args.loop)]
+    logger.disable("utils")  # delay logs each call
+
+    table: dict[str, dict[str, float]] = {}
+    for backend in backends:
+        table[backend] = run_async(run_benches(args.tasks, args.repeats), backend)
+    for name in BENCHES:
+        row = " | ".join(
+            f"{backend} {table[backend][name]:>12,.0f} ops/s" for backend in backends
+        )
+        fastest = max(backends, key=lambda backend: table[backend][name])
+        logger.info(f"{name:>27} | {row} | fastest {fastest}")
+
+
+if __name__ == "__main__":
+    main()
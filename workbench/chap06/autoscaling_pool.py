@@ -0,0 +1,71 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import get_context
+
+from loguru import logger
+from utils import (
+    AutoscalingProcessPoolExecutor,
+    AutoscalingThreadPoolExecutor,
+    run_async,
+)
+
+
+def fetch(seconds: float) -> float:
+    """Stand-in for a blocking IO call."""
+    time.sleep(seconds)
+    return seconds
+
+
+def count(count_to: int) -> int:
+    counter = 0
+    while counter < count_to:
+        counter = counter + 1
+    return counter
+
+
+async def run_io(num_calls: int) -> float:
+    """Make `num_calls` blocking calls with `asyncio.to_thread`."""
+    start = time.perf_counter()
+    await asyncio.gather(*[asyncio.to_thread(fetch, 0.05) for _ in range(num_calls)])
+    return time.perf_counter() - start
+
+
+async def run_cpu(pool: AutoscalingProcessPoolExecutor, num_calls: int) -> float:
+    """Make `num_calls` CPU-bound calls with `run_in_executor`."""
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    await asyncio.gather(
+        *[loop.run_in_executor(pool, count, 5_000_000) for _ in range(num_calls)]
+    )
+    return time.perf_counter() - start
+
+
+async def main() -> None:
+    loop = asyncio.get_running_loop()
+
+    # The default executor of asyncio has min(32, os.cpu_count() + 4) threads
+    default = ThreadPoolExecutor()
+    loop.set_default_executor(default)
+    elapsed = await run_io(2000)
+    logger.info(f"to_thread, default executor: {elapsed:.4f}s")
+    default.shutdown()
+
+    # run_async shuts down the default executor at exit
+    threads = AutoscalingThreadPoolExecutor(min_workers=4, max_workers=512)
+    loop.set_default_executor(threads)
+    elapsed = await run_io(2000)
+    logger.info(f"to_thread, autoscaling executor: {elapsed:.4f}s")
+    logger.info(threads.stats())
+
+    # Processes are added until the CPUs are busy, however many there are
+    with AutoscalingProcessPoolExecutor(
+        mp_context=get_context("forkserver")
+    ) as processes:
+        elapsed = await run_cpu(processes, 64)
+        logger.info(f"run_in_executor, autoscaling processes: {elapsed:.4f}s")
+        logger.info(processes.stats())
+
+
+if __name__ == "__main__":
+    run_async(main())
@@ -6,6 +6,8 @@ from functools import partial
 
 from loguru import logger
 
+from utils import offload, run_async
+
 
 def count(count_to: int) -> int:
     start = time.perf_counter()
@@ -30,5 +32,18 @@ async def main() -> None:
             print(result)
 
 
+async def main_v2() -> None:
+    # The shared pool is created once and reused by every call site
+    offloaded_count = offload(kind="process")(count)
+    numbers = [1_000_000_000, 1, 3, 5, 22]
+    results = await asyncio.gather(*[offloaded_count(number) for number in numbers])
+    for result in results:
+        print(result)
+    # Many small calls are sent to the pool in chunks
+    results = await offloaded_count.map(range(10_000))
+    print(sum(results))
+
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    run_async(main())
+    # run_async(main_v2())
@@ -1,6 +1,16 @@
+import multiprocessing
 import pathlib
+import resource
 import time
 from collections import defaultdict
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import polars as pl
+
+NGRAM_COLUMNS = ["word", "year", "match_count", "volume_count"]
 
 
 def main() -> None:
@@ -22,5 +32,81 @@ def main() -> None:
         print(f"{end-start:.4f}")
 
 
+def count_words_loop(file: pathlib.Path) -> dict[str, int]:
+    """Sum match counts per word with the line loop of `main`."""
+    freqs: dict[str, int] = defaultdict(int)
+    with open(file, encoding="utf-8") as f:
+        for line in f.readlines():
+            data = line.split("\t")
+            freqs[data[0]] += int(data[2])
+    return freqs
+
+
+def count_words_frame(file: pathlib.Path) -> "pl.DataFrame":
+    """Sum match counts per word with a vectorized group-by.
+
+    Polars memory-maps the file and parses the tab-separated columns in native
+    code, so no Python `str` is created per line. The streaming engine keeps the
+    peak memory bounded by the number of distinct words, not the file size.
+
+    Args:
+        file: A Google Books 1-gram file (`word \\t year \\t match_count \\t
+            volume_count` per line).
+
+    Returns:
+        A frame with the columns `word` and `match_count`.
+    """
+    # imported here so `main` runs without the optional chap06 group
+    import polars as pl
+
+    return (
+        pl.scan_csv(
+            file,
+            separator="\t",
+            has_header=False,
+            new_columns=NGRAM_COLUMNS,
+            schema_overrides={"word": pl.String, "match_count": pl.Int64},
+            quote_char=None,
+        )
+        .group_by("word")
+        .agg(pl.col("match_count").sum())
+        .collect(streaming=True)
+    )
+
+
+def count_words_vectorized(file: pathlib.Path) -> dict[str, int]:
+    """Same as `count_words_frame`, returned as the dict of `count_words_loop`."""
+    df = count_words_frame(file)
+    return dict(zip(df["word"], df["match_count"]))
+
+
+def _measure(
+    count_words: Callable[[pathlib.Path], dict[str, int]], file: pathlib.Path
+) -> tuple[float, int, int]:
+    """Run one parser in a fresh process and return time, peak RSS and words."""
+    start = time.perf_counter()
+    freqs = count_words(file)
+    end = time.perf_counter()
+    max_rss_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return end - start, max_rss_kib, len(freqs)
+
+
+def main_v2() -> None:
+    file = pathlib.Path("./data/googlebooks-eng-all-1gram-20120701-a")
+    for count_words in (count_words_loop, count_words_vectorized):
+        # A new process per parser so the peak RSS of one does not hide the other
+        with ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context("spawn")
+        ) as pool:
+            elapsed, max_rss_kib, words = pool.submit(
+                _measure, count_words, file
+            ).result()
+        print(
+            f"{count_words.__name__}: {words} words in {elapsed:.4f}s,"
+            f" peak RSS {max_rss_kib / 1024:.1f} MiB"
+        )
+
+
 if __name__ == "__main__":
     main()
+    # main_v2()
@@ -0,0 +1,178 @@
+import asyncio
+import mmap
+import os
+import pathlib
+import random
+import tempfile
+import time
+from asyncio.events import AbstractEventLoop
+from collections import defaultdict
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor
+
+from list_6_06 import merge_dictionaries
+from utils import run_async
+
+Mapper = Callable[[str], dict[str, int]]
+
+
+def map_ngram_frequency(text: str) -> dict[str, int]:
+    """Sum match counts per word of Google Books 1-gram lines.
+
+    Each line is `word \\t year \\t match_count \\t volume_count`.
+    """
+    frequencies: dict[str, int] = defaultdict(int)
+    for line in text.splitlines():
+        data = line.split("\t")
+        frequencies[data[0]] += int(data[2])
+    return frequencies
+
+
+def split_file(file: pathlib.Path, chunk_size: int) -> list[tuple[int, int]]:
+    """Split a file into byte ranges of about `chunk_size` ending on line breaks.
+
+    Args:
+        file: The file to split.
+        chunk_size: The target size of each range in bytes.
+
+    Returns:
+        The list of (start, end) byte ranges in file order.
+    """
+    size = file.stat().st_size
+    if size == 0:
+        return []
+    bounds = [0]
+    with (
+        open(file, "rb") as f,
+        mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm,
+    ):
+        while bounds[-1] + chunk_size < size:
+            idx = mm.find(b"\n", bounds[-1] + chunk_size)
+            if idx == -1:
+                break
+            bounds.append(idx + 1)
+    if bounds[-1] < size:
+        bounds.append(size)
+    return list(zip(bounds, bounds[1:]))
+
+
+def map_chunk(
+    mapper: Mapper, file: pathlib.Path, start: int, end: int
+) -> dict[str, int]:
+    """Read one byte range of a file and run the mapper on it in a worker."""
+    with open(file, "rb") as f:
+        f.seek(start)
+        text = f.read(end - start).decode("utf-8")
+    return mapper(text)
+
+
+def merge_larger(first: dict[str, int], second: dict[str, int]) -> dict[str, int]:
+    """Merge the smaller dictionary into the larger one."""
+    if len(first) < len(second):
+        first, second = second, first
+    return merge_dictionaries(first, second)
+
+
+async def map_reduce(
+    files: list[pathlib.Path],
+    pool: Executor,
+    mapper: Mapper = map_ngram_frequency,
+    chunk_size: int = 32 * 1024 * 1024,
+    merge_in_pool: bool = False,
+) -> dict[str, int]:
+    """Count word frequencies of files with a process pool.
+
+    Files are split into line-aligned chunks that are mapped in parallel. Partial
+    results are merged as soon as they are ready, so the reduction overlaps with
+    the mapping instead of being a left fold through `functools.reduce` at the end.
+    By default the parent merges them, the smaller into the larger: a merge in the
+    pool pickles two dictionaries in and one out, which costs more than the merge
+    itself (see `main_v2`). With `merge_in_pool`, pairs are merged in the pool,
+    a tree of depth log2(chunks).
+
+    Args:
+        files: The input files.
+        pool: The executor running mappers (and merges with `merge_in_pool`).
+        mapper: A picklable function mapping a chunk of text to frequencies.
+        chunk_size: The target size of each chunk in bytes.
+        merge_in_pool: Merge partial results in the pool instead of the parent.
+
+    Returns:
+        The merged frequencies.
+    """
+    loop: AbstractEventLoop = asyncio.get_running_loop()
+    pending: set[asyncio.Future[dict[str, int]]] = {
+        loop.run_in_executor(pool, map_chunk, mapper, file, start, end)
+        for file in files
+        for start, end in split_file(file, chunk_size)
+    }
+    ready: list[dict[str, int]] = []
+    try:
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            ready.extend(future.result() for future in done)
+            while len(ready) >= 2:
+                if merge_in_pool:
+                    pending.add(
+                        loop.run_in_executor(
+                            pool, merge_larger, ready.pop(), ready.pop()
+                        )
+                    )
+                else:
+                    ready.append(merge_larger(ready.pop(), ready.pop()))
+    finally:
+        for future in pending:
+            future.cancel()
+    return ready[0] if ready else {}
+
+
+async def main() -> None:
+    files = sorted(pathlib.Path("./data").glob("googlebooks-eng-all-1gram-20120701-*"))
+    workers = 1
+    while True:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            start = time.perf_counter()
+            freqs = await map_reduce(files, pool)
+            end = time.perf_counter()
+        print(f"workers {workers}: {len(freqs)} words in {end - start:.4f}")
+        if workers >= (os.cpu_count() or 1):
+            break
+        workers = min(workers * 2, os.cpu_count() or 1)
+
+
+def make_ngram_file(file: pathlib.Path, vocab_size: int, num_lines: int) -> None:
+    """Write a synthetic 1-gram file where every word appears at least once."""
+    rng = random.Random(0)
+    words = [f"word{i}" for i in range(vocab_size)]
+    with open(file, "w", encoding="utf-8") as f:
+        for word in words:
+            f.write(f"{word}\t2000\t{rng.randint(1, 100)}\t1\n")
+        for _ in range(num_lines - vocab_size):
+            f.write(f"{rng.choice(words)}\t2000\t{rng.randint(1, 100)}\t1\n")
+
+
+async def main_v2() -> None:
+    # Merge in the parent vs. in the pool, on a synthetic file
+    workers = os.cpu_count() or 1
+    with tempfile.TemporaryDirectory() as tmp:
+        file = pathlib.Path(tmp) / "googlebooks-eng-all-1gram-synthetic"
+        make_ngram_file(file, vocab_size=500_000, num_lines=4_000_000)
+        for merge_in_pool in (False, True):
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                start = time.perf_counter()
+                freqs = await map_reduce(
+                    [file],
+                    pool,
+                    chunk_size=4 * 1024 * 1024,
+                    merge_in_pool=merge_in_pool,
+                )
+                end = time.perf_counter()
+            where = "pool" if merge_in_pool else "parent"
+            print(f"merge in {where}: {len(freqs)} words in {end - start:.4f}")
+
+
+if __name__ == "__main__":
+    run_async(main())
+    # run_async(main_v2())
@@ -0,0 +1,292 @@
+import asyncio
+import multiprocessing
+import pathlib
+import tempfile
+import time
+from asyncio.events import AbstractEventLoop
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing.shared_memory import SharedMemory
+from multiprocessing.synchronize import Lock
+
+import numpy as np
+
+from map_reduce import (
+    make_ngram_file,
+    map_chunk,
+    map_ngram_frequency,
+    map_reduce,
+    split_file,
+)
+from utils import run_async
+
+FNV_OFFSET = np.uint64(0xCBF29CE484222325)
+FNV_PRIME = np.uint64(0x100000001B3)
+
+
+@dataclass(frozen=True)
+class CounterSpec:
+    """What a worker needs to attach to a shared counter.
+
+    Attributes:
+        name: The name of the shared memory block.
+        capacity: The number of slots of the hash table.
+        key_bytes: The max size of a word in UTF-8.
+        num_shards: The number of independently locked parts of the table.
+    """
+
+    name: str
+    capacity: int
+    key_bytes: int
+    num_shards: int
+
+
+def word_hashes(keys: np.ndarray) -> np.ndarray:
+    """64-bit FNV-1a of each fixed-width key, the same in every process.
+
+    Computed column by column over the whole batch, with uint64 wrap-around.
+    """
+    matrix = keys.view(np.uint8).reshape(len(keys), keys.dtype.itemsize)
+    hashes = np.full(len(keys), FNV_OFFSET, dtype=np.uint64)
+    for column in matrix.T:
+        hashes ^= column
+        hashes *= FNV_PRIME
+    return hashes
+
+
+class SharedCounter:
+    """Word counter in shared memory, updated in place by many processes.
+
+    The counter is an open-addressing hash table split into shards, each with its
+    own lock and slot range, laid out in one `SharedMemory` block as NumPy arrays
+    of fixed-width keys, counts and used flags. A worker adds a whole batch of
+    counts with array operations: it hashes and deduplicates the words, groups
+    them by shard, and under each shard lock probes all their slots at once,
+    comparing the stored keys so that words whose hashes collide are kept apart.
+    The parent reads the totals directly instead of unpickling and merging one
+    dictionary per worker.
+
+    Use `create` in the parent and `attach` in workers.
+    """
+
+    def __init__(self, spec: CounterSpec, locks: list[Lock], shm: SharedMemory) -> None:
+        self.spec = spec
+        self.locks = locks
+        self._shm = shm
+        self._shard_slots = spec.capacity // spec.num_shards
+
+        offset = 0
+
+        def view(dtype: np.dtype | type, size: int) -> np.ndarray:
+            nonlocal offset
+            array: np.ndarray = np.ndarray(
+                size, dtype=dtype, buffer=shm.buf, offset=offset
+            )
+            offset += array.nbytes
+            return array
+
+        self.counts = view(np.int64, spec.capacity)
+        self.keys = view(np.dtype(f"S{spec.key_bytes}"), spec.capacity)
+        self.used = view(np.bool_, spec.capacity)
+
+    @staticmethod
+    def nbytes(capacity: int, key_bytes: int) -> int:
+        return (8 + key_bytes + 1) * capacity
+
+    @classmethod
+    def create(
+        cls,
+        capacity: int,
+        key_bytes: int = 64,
+        num_shards: int = 64,
+        ctx: multiprocessing.context.BaseContext | None = None,
+    ) -> "SharedCounter":
+        """Allocate a counter (new shared memory is zero-filled).
+
+        Args:
+            capacity: The number of slots; keep it about twice the vocabulary size.
+            key_bytes: The max size of a word in UTF-8.
+            num_shards: The number of locks and table parts.
+            ctx: The multiprocessing context of the workers.
+        """
+        ctx = ctx or multiprocessing.get_context()
+        capacity -= capacity % num_shards
+        shm = SharedMemory(create=True, size=cls.nbytes(capacity, key_bytes))
+        spec = CounterSpec(shm.name, capacity, key_bytes, num_shards)
+        return cls(spec, [ctx.Lock() for _ in range(num_shards)], shm)
+
+    @classmethod
+    def attach(cls, spec: CounterSpec, locks: list[Lock]) -> "SharedCounter":
+        """Open a counter created by another process; `close` it when done."""
+        return cls(spec, locks, SharedMemory(name=spec.name))
+
+    def update(self, freqs: dict[str, int]) -> None:
+        """Add counts, taking each shard lock once for all its words."""
+        if not freqs:
+            return
+        words = np.char.encode(np.array(list(freqs), dtype=str), "utf-8")
+        if words.dtype.itemsize > self.spec.key_bytes:
+            raise ValueError(
+                f"Words must be at most {self.spec.key_bytes} bytes in UTF-8, got"
+                f" {words.dtype.itemsize}"
+            )
+        counts = np.fromiter(freqs.values(), dtype=np.int64, count=len(freqs))
+        self.update_arrays(words.astype(self.keys.dtype), counts)
+
+    def update_arrays(self, keys: np.ndarray, counts: np.ndarray) -> None:
+        """Add `counts[i]` to the count of `keys[i]`, keys being of `keys.dtype`."""
+        keys, inverse = np.unique(keys, return_inverse=True)
+        counts = np.bincount(inverse, weights=counts, minlength=len(keys))
+        counts = counts.astype(np.int64)
+        hashes = word_hashes(keys)
+        num_shards = np.uint64(self.spec.num_shards)
+        shards = (hashes % num_shards).astype(np.int64)
+        probes = ((hashes // num_shards) % np.uint64(self._shard_slots)).astype(
+            np.int64
+        )
+        order = np.argsort(shards, kind="stable")
+        bounds = np.searchsorted(shards[order], np.arange(self.spec.num_shards + 1))
+        for shard in range(self.spec.num_shards):
+            items = order[bounds[shard] : bounds[shard + 1]]
+            if len(items):
+                with self.locks[shard]:
+                    self._add(shard, keys[items], counts[items], probes[items])
+
+    def _add(
+        self, shard: int, keys: np.ndarray, counts: np.ndarray, probes: np.ndarray
+    ) -> None:
+        """Insert or add to distinct keys of one shard. Hold the shard lock."""
+        base = shard * self._shard_slots
+        pending = np.arange(len(keys))
+        for _ in range(2 * self._shard_slots + 1):
+            if not len(pending):
+                return
+            slots = base + probes[pending]
+            used = self.used[slots]
+            hit = used & (self.keys[slots] == keys[pending])
+            # keys are distinct, so no two of them hit the same slot
+            self.counts[slots[hit]] += counts[pending[hit]]
+            # several keys may probe the same free slot: the first one takes it
+            free = np.flatnonzero(~used)
+            taken, first = np.unique(slots[free], return_index=True)
+            winners = pending[free[first]]
+            self.keys[taken] = keys[winners]
+            self.counts[taken] = counts[winners]
+            self.used[taken] = True
+            done = hit
+            done[free[first]] = True
+            # keys behind another key move on; losers retry the now used slot
+            moved = pending[used & ~hit]
+            probes[moved] = (probes[moved] + 1) % self._shard_slots
+            pending = pending[~done]
+        raise ValueError(f"Hash table shard {shard} is full")
+
+    def to_dict(self) -> dict[str, int]:
+        """Read every word and its total count."""
+        used = np.flatnonzero(self.used)
+        return {
+            key.decode("utf-8"): count
+            for key, count in zip(self.keys[used].tolist(), self.counts[used].tolist())
+        }
+
+    def close(self) -> None:
+        # drop the views before closing, or the buffer is still exported
+        del self.counts, self.keys, self.used
+        self._shm.close()
+
+    def unlink(self) -> None:
+        self._shm.unlink()
+
+
+_spec: CounterSpec | None = None
+_locks: list[Lock] = []
+
+
+def _init_worker(spec: CounterSpec, locks: list[Lock]) -> None:
+    global _spec, _locks
+    _spec, _locks = spec, locks
+
+
+def _count_chunk(file: pathlib.Path, start: int, end: int) -> None:
+    assert _spec is not None
+    freqs = map_chunk(map_ngram_frequency, file, start, end)
+    counter = SharedCounter.attach(_spec, _locks)
+    try:
+        counter.update(freqs)
+    finally:
+        counter.close()
+
+
+async def count_shared(
+    files: list[pathlib.Path],
+    workers: int,
+    capacity: int,
+    key_bytes: int = 64,
+    chunk_size: int = 32 * 1024 * 1024,
+) -> dict[str, int]:
+    """Count word frequencies of 1-gram files into a shared counter.
+
+    Args:
+        files: The input files.
+        workers: The number of worker processes.
+        capacity: The number of hash table slots (about twice the vocabulary).
+        key_bytes: The max size of a word in UTF-8.
+        chunk_size: The target size of each chunk in bytes.
+
+    Returns:
+        The frequencies.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    counter = SharedCounter.create(capacity, key_bytes, ctx=ctx)
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=ctx,
+            initializer=_init_worker,
+            initargs=(counter.spec, counter.locks),
+        ) as pool:
+            loop: AbstractEventLoop = asyncio.get_running_loop()
+            await asyncio.gather(
+                *[
+                    loop.run_in_executor(pool, _count_chunk, file, start, end)
+                    for file in files
+                    for start, end in split_file(file, chunk_size)
+                ]
+            )
+        return counter.to_dict()
+    finally:
+        counter.close()
+        counter.unlink()
+
+
+async def main() -> None:
+    vocab_size = 1_000_000
+    workers = 4
+    chunk_size = 8 * 1024 * 1024
+    with tempfile.TemporaryDirectory() as tmp:
+        file = pathlib.Path(tmp) / "googlebooks-eng-all-1gram-synthetic"
+        make_ngram_file(file, vocab_size, 4 * vocab_size)
+        files = [file]
+
+        start = time.perf_counter()
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        ) as pool:
+            merged = await map_reduce(files, pool, chunk_size=chunk_size)
+        end = time.perf_counter()
+        print(f"dict merge: {len(merged)} words in {end - start:.4f}")
+
+        start = time.perf_counter()
+        shared = await count_shared(
+            files,
+            workers,
+            capacity=2 * vocab_size,
+            chunk_size=chunk_size,
+        )
+        end = time.perf_counter()
+        print(f"shared memory: {len(shared)} words in {end - start:.4f}")
+        assert shared == merged
+
+
+if __name__ == "__main__":
+    run_async(main())
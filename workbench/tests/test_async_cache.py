@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from utils import SingleFlight, async_lru_cache, coalesce
+
+
+def test_caller_joining_after_last_waiter_cancelled_starts_new_call() -> None:
+    async def main() -> list[int]:
+        flight = SingleFlight()
+        calls: list[int] = []
+
+        async def work() -> int:
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return len(calls)
+
+        first = asyncio.create_task(flight.do("key", work))
+        await asyncio.sleep(0)  # first is waiting on the shared call
+        first.cancel()
+        await asyncio.sleep(0)  # first's finally cancels the shared task
+        # joins before the cancelled task has run again
+        second = await flight.do("key", work)
+        return [second, len(calls)]
+
+    assert asyncio.run(main()) == [2, 2]
+
+
+def test_invalidate_before_load_starts_is_not_cached() -> None:
+    async def main() -> tuple[int, int]:
+        calls = 0
+
+        @async_lru_cache()
+        async def square(x: int) -> int:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0)
+            return x * x
+
+        pending = asyncio.create_task(square(6))
+        await asyncio.sleep(0)  # the miss started a load that has not run yet
+        square.cache_invalidate(6)
+        await pending
+        await square(6)
+        return calls, square.stats().misses
+
+    assert asyncio.run(main()) == (2, 2)
+
+
+def test_concurrent_calls_of_one_key_share_one_call() -> None:
+    async def main() -> tuple[list[int], int, int]:
+        calls = 0
+
+        @coalesce()
+        async def square(x: int) -> int:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return x * x
+
+        results = await asyncio.gather(*[square(4) for _ in range(10)])
+        return results, calls, square.stats().coalesced
+
+    assert asyncio.run(main()) == ([16] * 10, 1, 9)
+
+
+def test_failure_is_not_cached() -> None:
+    async def main() -> tuple[int, int]:
+        calls = 0
+
+        @async_lru_cache()
+        async def flaky(x: int) -> int:
+            nonlocal calls
+            calls += 1
+            if calls == 1:
+                raise ConnectionError("down")
+            return x
+
+        with pytest.raises(ConnectionError):
+            await flaky(1)
+        return await flaky(1), calls
+
+    assert asyncio.run(main()) == (1, 2)
+
+
+def test_method_is_cached_per_instance() -> None:
+    class Squares:
+        def __init__(self, offset: int) -> None:
+            self.offset = offset
+            self.calls = 0
+
+        @async_lru_cache()
+        async def get(self, x: int) -> int:
+            self.calls += 1
+            return x * x + self.offset
+
+    async def main() -> tuple[int, int, int, int]:
+        a, b = Squares(0), Squares(1)
+        results = [await a.get(3), await a.get(3), await b.get(3)]
+        Squares.get.cache_invalidate(a, 3)
+        await a.get(3)
+        return results[0], results[2], a.calls, b.calls
+
+    assert asyncio.run(main()) == (9, 10, 2, 1)
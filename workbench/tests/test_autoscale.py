@@ -0,0 +1,49 @@
+import pathlib
+from collections.abc import Callable
+from concurrent.futures import Future
+from typing import Any
+
+import pytest
+
+from utils import AutoscalingExecutor
+from utils.autoscale import CpuMeter
+
+
+def test_executor_without_pool_hooks_cannot_be_created() -> None:
+    class NoShutdown(AutoscalingExecutor):
+        def _submit_to_pool(
+            self, fn: Callable[..., Any], args: tuple, kwargs: dict
+        ) -> Future:
+            raise AssertionError("not called")
+
+    with pytest.raises(TypeError, match="_shutdown_pool"):
+        NoShutdown(1, 1)  # type: ignore[abstract]
+
+
+def test_cpu_meter_is_relative_to_the_cgroup_limit(
+    tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    clock_us = 0
+    monkeypatch.setattr("utils.autoscale.time.monotonic_ns", lambda: clock_us * 1000)
+    (tmp_path / "cpu.max").write_text("50000 100000\n")  # half a CPU
+    (tmp_path / "cpu.stat").write_text("usage_usec 1000000\nuser_usec 900000\n")
+    meter = CpuMeter(tmp_path)
+
+    # 0.25s of CPU in 1s is half of the limit, whatever the host does
+    clock_us += 1_000_000
+    (tmp_path / "cpu.stat").write_text("usage_usec 1250000\nuser_usec 1100000\n")
+    assert meter.read() == pytest.approx(0.5)
+
+    clock_us += 1_000_000
+    (tmp_path / "cpu.stat").write_text("usage_usec 1750000\nuser_usec 1500000\n")
+    assert meter.read() == pytest.approx(1.0)
+
+
+def test_cpu_meter_without_cgroup_limit_reads_the_host(
+    tmp_path: pathlib.Path,
+) -> None:
+    (tmp_path / "cpu.max").write_text("max 100000\n")
+    (tmp_path / "cpu.stat").write_text("usage_usec 1000000\n")
+    meter = CpuMeter(tmp_path)
+    assert meter._limit is None
+    assert 0.0 <= meter.read() <= 1.0
@@ -0,0 +1,98 @@
+import asyncio
+import time
+
+import pytest
+
+from utils import DeadlineExceeded, deadline, delay, remaining, shielded
+from utils.deadline import within_deadline
+
+
+def test_async_deadline_cancels_the_block() -> None:
+    async def main() -> None:
+        async with deadline(0.05):
+            await asyncio.sleep(1)
+
+    start = time.perf_counter()
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(main())
+    assert time.perf_counter() - start < 0.5
+
+
+def test_expired_deadline_fails_fast_in_tasks() -> None:
+    async def main() -> None:
+        with deadline(0.01):
+            await asyncio.sleep(0.02)
+            # the task inherits the deadline, which has passed
+            await asyncio.create_task(delay(1))
+
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(main())
+
+
+def test_nested_deadline_never_extends() -> None:
+    async def main() -> tuple[float, float, float | None]:
+        with deadline(0.1):
+            with deadline(10):
+                inner = remaining()
+            with deadline(0.01):
+                shorter = remaining()
+        assert inner is not None and shorter is not None
+        return inner, shorter, remaining()
+
+    inner, shorter, after = asyncio.run(main())
+    assert inner <= 0.1
+    assert shorter <= 0.01
+    assert after is None
+
+
+def test_timeout_before_deadline_is_a_plain_timeout() -> None:
+    async def main() -> None:
+        with deadline(10):
+            async with within_deadline(0.01):
+                await asyncio.sleep(1)
+
+    with pytest.raises(TimeoutError) as info:
+        asyncio.run(main())
+    assert not isinstance(info.value, DeadlineExceeded)
+
+
+def test_shielded_cleanup_ignores_the_deadline() -> None:
+    async def main() -> int:
+        with deadline(0.01):
+            await asyncio.sleep(0.02)
+            return await shielded(delay(0))
+
+    assert asyncio.run(main()) == 0
+
+
+def test_shielded_cleanup_completes_before_cancellation() -> None:
+    async def main() -> list[str]:
+        events: list[str] = []
+
+        async def cleanup() -> None:
+            await asyncio.sleep(0.05)
+            events.append("cleaned up")
+
+        async def work() -> None:
+            try:
+                await asyncio.sleep(1)
+            finally:
+                await shielded(cleanup())
+
+        task = asyncio.create_task(work())
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        events.append("cancelled")
+        return events
+
+    assert asyncio.run(main()) == ["cleaned up", "cancelled"]
+
+
+def test_shielded_grace_bounds_cleanup() -> None:
+    async def main() -> None:
+        await shielded(asyncio.sleep(1), grace=0.01)
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(main())
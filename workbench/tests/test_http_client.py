@@ -0,0 +1,126 @@
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+
+import pytest
+
+from utils import HttpClient, ProtocolError, StandInServer
+
+
+def serve(
+    test: Callable[[StandInServer, str], Awaitable[None]], latency: float = 0.0
+) -> None:
+    """Run `test` with a stand-in server listening on a free port."""
+
+    async def main() -> None:
+        server = StandInServer(latency)
+        async with server.serve() as port:
+            await test(server, f"http://127.0.0.1:{port}")
+
+    asyncio.run(main())
+
+
+def test_keep_alive_reuses_one_connection() -> None:
+    async def test(server: StandInServer, base: str) -> None:
+        async with HttpClient() as client:
+            for i in range(20):
+                response = await client.get(f"{base}/item/{i}")
+                assert response.body == f"/item/{i}".encode()
+            assert client.connections_opened == 1
+        assert server.connections == 1
+
+    serve(test)
+
+
+def test_chunked_body() -> None:
+    async def test(server: StandInServer, base: str) -> None:
+        async with HttpClient() as client:
+            response = await client.get(f"{base}/chunked")
+            assert response.body == b"hello, world"
+            # the connection is still usable after the last chunk
+            assert (await client.get(f"{base}/next")).body == b"/next"
+            assert client.connections_opened == 1
+
+    serve(test)
+
+
+def test_connection_closed_mid_response() -> None:
+    async def test(server: StandInServer, base: str) -> None:
+        async with HttpClient() as client:
+            with pytest.raises(asyncio.IncompleteReadError):
+                await client.get(f"{base}/cut")
+            assert (await client.get(f"{base}/after")).body == b"/after"
+            assert client.connections_opened == 2
+
+    serve(test)
+
+
+def test_falls_back_to_next_address() -> None:
+    async def test(server: StandInServer, base: str) -> None:
+        async with HttpClient() as client:
+
+            async def resolve(host: str, port: int) -> list[str]:
+                return ["127.0.0.2", "127.0.0.1"]  # nothing listens on the first
+
+            client._resolve = resolve  # type: ignore[method-assign]
+            assert (await client.get(f"{base}/ok")).body == b"/ok"
+
+    serve(test)
+
+
+def test_interim_response_is_skipped() -> None:
+    async def test(server: StandInServer, base: str) -> None:
+        async with HttpClient() as client:
+            response = await client.get(f"{base}/continue")
+            assert (response.status, response.body) == (200, b"/continue")
+            # the next request on the connection reads its own response
+            assert (await client.get(f"{base}/next")).body == b"/next"
+            assert client.connections_opened == 1
+
+    serve(test)
+
+
+def test_repeated_headers_are_joined() -> None:
+    async def test(server: StandInServer, base: str) -> None:
+        async with HttpClient() as client:
+            response = await client.get(f"{base}/cookies")
+            assert response.headers["set-cookie"] == "a=1, b=2"
+
+    serve(test)
+
+
+def test_empty_chunk_size_is_a_protocol_error() -> None:
+    async def test(server: StandInServer, base: str) -> None:
+        async with HttpClient() as client:
+            with pytest.raises(ProtocolError):
+                await client.get(f"{base}/bad-chunk")
+            # the broken connection is not reused
+            assert (await client.get(f"{base}/after")).body == b"/after"
+            assert client.connections_opened == 2
+
+    serve(test)
+
+
+def test_requests_overlap_server_latency() -> None:
+    async def test(server: StandInServer, base: str) -> None:
+        async with HttpClient(limit_per_host=10) as client:
+            start = time.perf_counter()
+            responses = await client.fetch_all(f"{base}/{i}" for i in range(40))
+            elapsed = time.perf_counter() - start
+            assert [r.body for r in responses] == [  # type: ignore[union-attr]
+                f"/{i}".encode() for i in range(40)
+            ]
+            # one after another, 40 requests would take about 2s
+            assert elapsed < 1.0
+            assert client.connections_opened <= 10
+
+    serve(test, latency=0.05)
+
+
+def test_timeout_covers_server_latency() -> None:
+    async def test(server: StandInServer, base: str) -> None:
+        async with HttpClient(timeout=0.05) as client:
+            with pytest.raises(TimeoutError):
+                await client.get(f"{base}/slow")
+
+    serve(test, latency=0.5)
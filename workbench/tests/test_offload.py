@@ -0,0 +1,54 @@
+import asyncio
+import threading
+
+from utils import configure_offload, offload
+
+
+def test_thread_map_runs_local_functions() -> None:
+    def square(x: int) -> int:
+        return x * x
+
+    async def main() -> list[int]:
+        return await offload(kind="thread")(square).map(range(10), chunksize=3)
+
+    assert asyncio.run(main()) == [x * x for x in range(10)]
+
+
+def test_offloaded_method_is_bound() -> None:
+    class Counter:
+        def __init__(self) -> None:
+            self.total = 0
+
+        @offload(kind="thread")
+        def add(self, n: int) -> int:
+            self.total += n
+            return self.total
+
+    async def main() -> int:
+        counter = Counter()
+        await counter.add(2)
+        return await counter.add(3)
+
+    assert asyncio.run(main()) == 5
+
+
+def test_configure_does_not_cancel_queued_calls() -> None:
+    release = threading.Event()
+
+    def wait(n: int) -> int:
+        release.wait(5)
+        return n
+
+    async def main() -> list[int]:
+        configure_offload(thread_workers=1)
+        offloaded = offload(kind="thread")(wait)
+        calls = [asyncio.ensure_future(offloaded(n)) for n in range(3)]
+        await asyncio.sleep(0.05)  # the first call runs, the others are queued
+        configure_offload()
+        release.set()
+        return await asyncio.gather(*calls)
+
+    try:
+        assert asyncio.run(main()) == [0, 1, 2]
+    finally:
+        configure_offload()
@@ -1,4 +1,54 @@
-from .async_timer import async_timed
+from async_timer import REGISTRY, async_timed, sync_timed
+
+from .async_cache import SingleFlight, async_lru_cache, coalesce
+from .autoscale import (
+    AutoscaleStats,
+    AutoscalingExecutor,
+    AutoscalingProcessPoolExecutor,
+    AutoscalingThreadPoolExecutor,
+)
+from .deadline import (
+    DeadlineExceeded,
+    deadline,
+    remaining,
+    shielded,
+    timeout_for,
+    within_deadline,
+)
 from .delay_functions import delay
+from .http_client import HttpClient, ProtocolError, Response
+from .loop_monitor import LoopMonitor
+from .loop_runner import LOOP_ENV, available_backends, resolve_backend, run_async
+from .offload import configure_offload, offload
+from .stand_in_server import StandInServer
 
-__all__ = ["delay", "async_timed"]
+__all__ = [
+    "delay",
+    "async_timed",
+    "sync_timed",
+    "REGISTRY",
+    "LoopMonitor",
+    "offload",
+    "configure_offload",
+    "HttpClient",
+    "Response",
+    "ProtocolError",
+    "StandInServer",
+    "deadline",
+    "DeadlineExceeded",
+    "remaining",
+    "timeout_for",
+    "within_deadline",
+    "shielded",
+    "coalesce",
+    "SingleFlight",
+    "async_lru_cache",
+    "AutoscalingExecutor",
+    "AutoscalingThreadPoolExecutor",
+    "AutoscalingProcessPoolExecutor",
+    "AutoscaleStats",
+    "run_async",
+    "available_backends",
+    "resolve_backend",
+    "LOOP_ENV",
+]
@@ -0,0 +1,357 @@
+import asyncio
+import functools
+import math
+import sys
+import time
+import types
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from dataclasses import dataclass
+from typing import Any, Generic, ParamSpec, TypeVar
+
+from loguru import logger
+
+P = ParamSpec("P")  # For function parameters
+R = TypeVar("R")  # For return type
+
+_KWARGS_MARK = object()  # separates args from kwargs in cache keys
+
+
+def make_key(args: tuple, kwargs: dict[str, Any]) -> Hashable:
+    """Build a cache key from call arguments, like `functools.lru_cache`."""
+    if not kwargs:
+        return args
+    return args + (_KWARGS_MARK,) + tuple(sorted(kwargs.items()))
+
+
+@dataclass
+class _Call:
+    future: asyncio.Future
+    task: asyncio.Task | None = None
+    waiters: int = 0
+    background: bool = False
+
+
+class SingleFlight:
+    """Share one in-flight call among concurrent callers of the same key.
+
+    The first caller of a key creates a `Future` and a task that sets it, as in
+    `list_2_15`; callers arriving before it is done await the same `Future` instead
+    of starting their own work. A cancelled caller does not cancel the shared
+    work, unless it was the last one waiting for it.
+    """
+
+    def __init__(self) -> None:
+        self._calls: dict[Hashable, _Call] = {}
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[R]]) -> R:
+        """Await the in-flight call of `key`, starting it with `factory` if none.
+
+        Args:
+            key: The key identifying identical calls.
+            factory: Zero-argument callable returning the awaitable to run.
+
+        Returns:
+            The result of the shared call.
+        """
+        call = self._calls.get(key) or self._start(key, factory)
+        return await self._wait(key, call)
+
+    async def join(self, key: Hashable) -> Any:
+        """Await the call in flight for `key`.
+
+        Raises:
+            KeyError: If no call is in flight for `key`.
+        """
+        return await self._wait(key, self._calls[key])
+
+    async def _wait(self, key: Hashable, call: _Call) -> Any:
+        call.waiters += 1
+        try:
+            # shield: one cancelled caller must not cancel the others' result
+            return await asyncio.shield(call.future)
+        finally:
+            call.waiters -= 1
+            if (
+                call.waiters == 0
+                and not call.background
+                and call.task is not None
+                and not call.task.done()
+            ):
+                # forget it now: a caller joining before the task handles the
+                # cancellation would get its CancelledError
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+                call.task.cancel()
+
+    def start(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> None:
+        """Start a call in the background, unless one is in flight for `key`.
+
+        The call runs to completion even if nobody waits for it.
+        """
+        call = self._calls.get(key) or self._start(key, factory)
+        call.background = True
+
+    def forget(self, key: Hashable) -> None:
+        """Make the next caller of `key` start a new call.
+
+        The call in flight still completes for the callers already waiting.
+        """
+        self._calls.pop(key, None)
+
+    def forget_all(self) -> None:
+        """Make the next caller of every key start a new call."""
+        self._calls.clear()
+
+    def _start(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> _Call:
+        call = _Call(asyncio.get_running_loop().create_future())
+        self._calls[key] = call
+        call.task = asyncio.create_task(self._run(key, call, factory))
+        return call
+
+    async def _run(
+        self, key: Hashable, call: _Call, factory: Callable[[], Awaitable[Any]]
+    ) -> None:
+        try:
+            result = await factory()
+        except asyncio.CancelledError:
+            call.future.cancel()
+            raise
+        except BaseException as e:
+            call.future.set_exception(e)
+            if call.waiters == 0:
+                call.future.exception()  # retrieved: nobody else will
+                logger.warning(f"background call of {key!r} failed: {e!r}")
+        else:
+            call.future.set_result(result)
+        finally:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+
+
+@dataclass
+class _Entry:
+    value: Any
+    fresh_until: float
+    stale_until: float
+    size: int
+
+
+@dataclass
+class CacheStats:
+    """Counters of a `CoalescedFunction`.
+
+    Attributes:
+        hits: Calls answered with a fresh cached value.
+        stale_hits: Calls answered with a stale value while it was refreshed.
+        misses: Calls that started a call of the function.
+        coalesced: Calls that joined a call already in flight.
+        refreshes: Background refreshes started by stale hits.
+        size: Number of cached values.
+        nbytes: Total size of the cached values, as measured by `sizeof`.
+    """
+
+    hits: int = 0
+    stale_hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    refreshes: int = 0
+    size: int = 0
+    nbytes: int = 0
+
+
+class CoalescedFunction(Generic[P, R]):
+    """A coroutine function wrapped with single-flight and a TTL/LRU cache.
+
+    See `coalesce`.
+    """
+
+    def __init__(
+        self,
+        func: Callable[P, Awaitable[R]],
+        ttl: float | None,
+        stale_ttl: float,
+        maxsize: int | None,
+        max_bytes: int | None = None,
+        sizeof: Callable[[Any], int] = sys.getsizeof,
+    ) -> None:
+        functools.update_wrapper(self, func)
+        self.func = func
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._expires = ttl is not None and ttl != math.inf
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self._flight = SingleFlight()
+        self._entries: OrderedDict[Hashable, _Entry] = OrderedDict()
+        self._nbytes = 0
+        # key -> token of the latest load, so invalidated loads are not stored
+        self._loading: dict[Hashable, object] = {}
+        self._stats = CacheStats()
+
+    def __get__(self, instance: Any, owner: type | None = None) -> Any:
+        """Bind to `instance` when decorating a method, like `functools.lru_cache`.
+
+        The instance is part of the cache key, so pass it to `cache_invalidate`:
+        `Class.method.cache_invalidate(instance, ...)`.
+        """
+        if instance is None:
+            return self
+        return types.MethodType(self, instance)
+
+    async def __call__(self, *args: P.args, **kwargs: P.kwargs) -> R:
+        key = make_key(args, kwargs)
+        entry = self._entries.get(key)
+        if entry is not None:
+            # entries without ttl skip the clock: this is the hot path of a hit
+            now = time.monotonic() if self._expires else 0.0
+            if now < entry.fresh_until:
+                self._stats.hits += 1
+                self._entries.move_to_end(key)
+                return entry.value
+            if now < entry.stale_until:
+                self._stats.stale_hits += 1
+                self._entries.move_to_end(key)
+                if key not in self._flight:
+                    self._stats.refreshes += 1
+                    token = self._loading[key] = object()
+                    self._flight.start(
+                        key, lambda: self._load(key, token, args, kwargs)
+                    )
+                return entry.value
+        if key in self._flight:
+            self._stats.coalesced += 1
+            return await self._flight.join(key)
+        self._stats.misses += 1
+        # set before the task runs, so an invalidation in between is seen
+        token = self._loading[key] = object()
+        return await self._flight.do(key, lambda: self._load(key, token, args, kwargs))
+
+    async def _load(
+        self, key: Hashable, token: object, args: tuple, kwargs: dict[str, Any]
+    ) -> R:
+        try:
+            value = await self.func(*args, **kwargs)
+        finally:
+            latest = self._loading.get(key) is token
+            if latest:
+                del self._loading[key]
+        if self.ttl is not None and latest:
+            self._store(key, value)
+        return value
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        assert self.ttl is not None
+        self._discard(key)
+        now = time.monotonic()
+        size = self.sizeof(value) if self.max_bytes is not None else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            return  # would evict everything else and still not fit
+        self._entries[key] = _Entry(
+            value, now + self.ttl, now + self.ttl + self.stale_ttl, size
+        )
+        self._nbytes += size
+        while self._entries and (
+            (self.maxsize is not None and len(self._entries) > self.maxsize)
+            or (self.max_bytes is not None and self._nbytes > self.max_bytes)
+        ):
+            _, evicted = self._entries.popitem(last=False)
+            self._nbytes -= evicted.size
+
+    def _discard(self, key: Hashable) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self._nbytes -= entry.size
+        return True
+
+    def stats(self) -> CacheStats:
+        """Return a snapshot of the counters."""
+        return CacheStats(
+            hits=self._stats.hits,
+            stale_hits=self._stats.stale_hits,
+            misses=self._stats.misses,
+            coalesced=self._stats.coalesced,
+            refreshes=self._stats.refreshes,
+            size=len(self._entries),
+            nbytes=self._nbytes,
+        )
+
+    def cache_invalidate(self, *args: P.args, **kwargs: P.kwargs) -> bool:
+        """Drop the cached value of these arguments.
+
+        A call in flight for them is not joined by later callers, and its result
+        is not cached.
+
+        Returns:
+            Whether a value was cached.
+        """
+        key = make_key(args, kwargs)
+        self._loading.pop(key, None)
+        self._flight.forget(key)
+        return self._discard(key)
+
+    def cache_clear(self) -> None:
+        """Drop every cached value, and ignore the results of calls in flight."""
+        self._entries.clear()
+        self._nbytes = 0
+        self._loading.clear()
+        self._flight.forget_all()
+
+
+def coalesce(ttl: float | None = None, stale_ttl: float = 0.0, maxsize: int = 1024):
+    """Decorator to coalesce concurrent identical calls of a coroutine function.
+
+    Concurrent calls with the same arguments share one call of the function. With
+    `ttl`, results are also cached for `ttl` seconds in an LRU of `maxsize`
+    entries; for `stale_ttl` more seconds, the stale value is returned at once
+    while a single background call refreshes it. Exceptions are never cached.
+
+    Args:
+        ttl: Seconds a result stays fresh (no result cache if None).
+        stale_ttl: Seconds a result may be served stale after `ttl`.
+        maxsize: Max number of cached results.
+    """
+
+    def wrapper(func: Callable[P, Awaitable[R]]) -> CoalescedFunction[P, R]:
+        return CoalescedFunction(func, ttl, stale_ttl, maxsize)
+
+    return wrapper
+
+
+def async_lru_cache(
+    maxsize: int | None = 128,
+    ttl: float | None = None,
+    max_bytes: int | None = None,
+    sizeof: Callable[[Any], int] = sys.getsizeof,
+):
+    """Decorator to memoize a coroutine function, like `functools.lru_cache`.
+
+    Awaited results are cached, not coroutine objects, so a value can be awaited
+    any number of times. Concurrent misses of the same arguments share one call
+    (see `coalesce`), and a cancelled caller only cancels that call if nobody else
+    waits for it. Use `cache_invalidate(*args, **kwargs)` to drop one value.
+
+    Args:
+        maxsize: Max number of cached values (unbounded if None).
+        ttl: Seconds a value stays cached (forever if None).
+        max_bytes: Max total size of the cached values (unbounded if None).
+        sizeof: Size of a value in bytes. `sys.getsizeof` is shallow: pass a
+            deeper measure for containers.
+    """
+
+    def wrapper(func: Callable[P, Awaitable[R]]) -> CoalescedFunction[P, R]:
+        return CoalescedFunction(
+            func,
+            ttl=math.inf if ttl is None else ttl,
+            stale_ttl=0.0,
+            maxsize=maxsize,
+            max_bytes=max_bytes,
+            sizeof=sizeof,
+        )
+
+    return wrapper
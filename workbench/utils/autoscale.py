@@ -0,0 +1,413 @@
+import functools
+import os
+import pathlib
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from multiprocessing.context import BaseContext
+from typing import Any, ParamSpec, TypeVar
+
+from loguru import logger
+
+P = ParamSpec("P")  # For function parameters
+R = TypeVar("R")  # For return type
+
+CGROUP_DIR = pathlib.Path("/sys/fs/cgroup")
+
+
+def _read_cpu_times() -> tuple[int, int] | None:
+    """Return (busy, total) jiffies of all CPUs of the host, None if unavailable."""
+    try:
+        with open("/proc/stat") as f:
+            fields = [int(v) for v in f.readline().split()[1:]]
+    except (OSError, ValueError):
+        return None
+    idle = fields[3] + (fields[4] if len(fields) > 4 else 0)  # idle + iowait
+    total = sum(fields[:8])  # guest time is already counted in user
+    return total - idle, total
+
+
+def _read_cgroup_limit(cgroup_dir: pathlib.Path) -> float | None:
+    """Return the CPU limit of a cgroup v2 in CPUs, None if it has none."""
+    try:
+        quota, period = (cgroup_dir / "cpu.max").read_text().split()
+        return None if quota == "max" else int(quota) / int(period)
+    except (OSError, ValueError):
+        return None
+
+
+def _read_cgroup_usage(cgroup_dir: pathlib.Path) -> int | None:
+    """Return the CPU time used by a cgroup v2 in µs, None if unavailable."""
+    try:
+        with open(cgroup_dir / "cpu.stat") as f:
+            for line in f:
+                name, value = line.split()
+                if name == "usage_usec":
+                    return int(value)
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+class CpuMeter:
+    """CPU utilisation in [0, 1] since the previous reading.
+
+    In a cgroup v2 with a CPU limit, e.g. a container run with `--cpus`, this is
+    the share of the limit used by the cgroup, from `cpu.max` and `cpu.stat`:
+    the host may be idle while the quota is exhausted. Otherwise it is the host
+    utilisation from /proc/stat, or the 1-minute load average where it does not
+    exist.
+
+    Args:
+        cgroup_dir: The cgroup v2 directory of this process.
+    """
+
+    def __init__(self, cgroup_dir: pathlib.Path = CGROUP_DIR) -> None:
+        self._cpus = os.cpu_count() or 1
+        self._cgroup_dir = cgroup_dir
+        limit = _read_cgroup_limit(cgroup_dir)
+        self._limit = None if limit is None else min(limit, self._cpus)
+        self._last = _read_cpu_times()
+        self._last_usage = self._read_usage()
+
+    def _read_usage(self) -> tuple[int, int] | None:
+        """Return (used, elapsed) µs of the cgroup, None without a CPU limit."""
+        if self._limit is None:
+            return None
+        usage = _read_cgroup_usage(self._cgroup_dir)
+        return None if usage is None else (usage, time.monotonic_ns() // 1000)
+
+    def read(self) -> float:
+        if self._limit is not None:
+            now_usage = self._read_usage()
+            last_usage, self._last_usage = self._last_usage, now_usage
+            if (
+                now_usage is not None
+                and last_usage is not None
+                and now_usage[1] > last_usage[1]
+            ):
+                used = now_usage[0] - last_usage[0]
+                busy = used / ((now_usage[1] - last_usage[1]) * self._limit)
+                return min(1.0, max(0.0, busy))
+        now = _read_cpu_times()
+        if now is not None and self._last is not None and now[1] > self._last[1]:
+            busy = (now[0] - self._last[0]) / (now[1] - self._last[1])
+            self._last = now
+            return min(1.0, max(0.0, busy))
+        try:
+            return min(1.0, os.getloadavg()[0] / self._cpus)
+        except OSError:
+            return 0.0
+
+
+@dataclass
+class AutoscaleStats:
+    """Counters of an `AutoscalingExecutor`.
+
+    Attributes:
+        workers: Current number of calls allowed to run at once.
+        peak_workers: Highest `workers` so far.
+        queued: Calls waiting for a worker.
+        running: Calls running.
+        completed: Calls done.
+        scale_ups: Times `workers` was raised.
+        scale_downs: Times `workers` was lowered.
+        latency: Mean seconds of the calls done in the last control interval.
+        cpu: CPU utilisation in the last control interval (see `CpuMeter`).
+    """
+
+    workers: int = 0
+    peak_workers: int = 0
+    queued: int = 0
+    running: int = 0
+    completed: int = 0
+    scale_ups: int = 0
+    scale_downs: int = 0
+    latency: float = 0.0
+    cpu: float = 0.0
+
+
+_Call = tuple[Future, Callable[..., Any], tuple, dict[str, Any]]
+
+
+class AutoscalingExecutor(Executor, ABC):
+    """Executor whose number of workers follows the load, within bounds.
+
+    Calls wait in a queue and at most `workers` of them run at once. A control
+    thread checks every `interval` seconds and, at most once per `cooldown`:
+
+    - adds workers while calls are queued, the CPU is below `cpu_high` and
+      latency has not grown past `latency_ratio` times the best seen, so blocking
+      IO gets many threads while CPU-bound work stops at the point of saturation;
+    - removes workers when some have been idle, or when the CPU is saturated and
+      latency has grown, i.e. the workers only slow each other down.
+
+    Use `AutoscalingThreadPoolExecutor` or `AutoscalingProcessPoolExecutor`. Both
+    can be passed to `run_in_executor`. Workers are started on demand and stay
+    parked when the number of workers goes down.
+
+    Args:
+        min_workers: Lower bound of the number of workers.
+        max_workers: Upper bound of the number of workers.
+        interval: Seconds between two control decisions.
+        cooldown: Min seconds between two changes of the number of workers.
+        cpu_high: CPU utilisation above which no worker is added. In a container
+            with a CPU limit, it is relative to that limit (see `CpuMeter`).
+        latency_ratio: Latency growth, relative to the best seen, above which no
+            worker is added.
+    """
+
+    kind = ""  # for logs
+
+    def __init__(
+        self,
+        min_workers: int,
+        max_workers: int,
+        interval: float = 0.25,
+        cooldown: float = 1.0,
+        cpu_high: float = 0.9,
+        latency_ratio: float = 1.5,
+    ) -> None:
+        if not 1 <= min_workers <= max_workers:
+            raise ValueError(
+                f"Need 1 <= min_workers <= max_workers={max_workers}, got {min_workers}"
+            )
+        self.min_workers = min_workers
+        self.max_workers = max_workers
+        self.interval = interval
+        self.cooldown = cooldown
+        self.cpu_high = cpu_high
+        self.latency_ratio = latency_ratio
+        self._workers = min_workers
+        self._queue: deque[_Call] = deque()
+        self._running = 0
+        # reentrant: a call done before add_done_callback runs `_done` at once
+        self._lock = threading.RLock()
+        self._drained = threading.Condition(self._lock)
+        self._closing = False
+        self._closed = False
+        self._stats = AutoscaleStats(workers=min_workers, peak_workers=min_workers)
+        self._latencies: list[float] = []  # of the current control interval
+        self._best_latency = float("inf")
+        self._last_change = 0.0
+        self._cpu = CpuMeter()
+        self._stop = threading.Event()
+        self._controller = threading.Thread(
+            target=self._control, name="autoscale-control", daemon=True
+        )
+        self._controller.start()
+
+    @abstractmethod
+    def _submit_to_pool(
+        self, fn: Callable[..., Any], args: tuple, kwargs: dict
+    ) -> Future:
+        """Run a call in the underlying pool."""
+
+    @abstractmethod
+    def _shutdown_pool(self, wait: bool) -> None:
+        """Shut down the underlying pool."""
+
+    @property
+    def workers(self) -> int:
+        """Current number of calls allowed to run at once."""
+        return self._workers
+
+    def submit(
+        self, fn: Callable[P, R], /, *args: P.args, **kwargs: P.kwargs
+    ) -> Future[R]:
+        future: Future[R] = Future()
+        with self._lock:
+            if self._closing:
+                raise RuntimeError("cannot schedule new futures after shutdown")
+            self._queue.append((future, fn, args, kwargs))
+            self._dispatch()
+        return future
+
+    def _dispatch(self) -> None:
+        """Start queued calls while there are free workers; hold the lock."""
+        while self._queue and self._running < self._workers:
+            future, fn, args, kwargs = self._queue.popleft()
+            if not future.set_running_or_notify_cancel():
+                continue  # cancelled while queued
+            start = time.perf_counter()
+            try:
+                inner = self._submit_to_pool(fn, args, kwargs)
+            except Exception as e:  # e.g. BrokenProcessPool
+                future.set_exception(e)
+                continue
+            self._running += 1
+            inner.add_done_callback(functools.partial(self._done, future, start))
+        if self._closing and not self._queue and not self._running:
+            self._drained.notify_all()
+            if not self._closed:
+                self._closed = True
+                self._close(wait=False)
+
+    def _done(self, future: Future, start: float, inner: Future) -> None:
+        with self._lock:
+            self._running -= 1
+            self._stats.completed += 1
+            self._latencies.append(time.perf_counter() - start)
+            self._dispatch()
+        if inner.cancelled():
+            future.set_exception(RuntimeError("executor was shut down"))
+        elif (exc := inner.exception()) is not None:
+            future.set_exception(exc)
+        else:
+            future.set_result(inner.result())
+
+    def _control(self) -> None:
+        while not self._stop.wait(self.interval):
+            cpu = self._cpu.read()
+            with self._lock:
+                self._scale(cpu)
+
+    def _scale(self, cpu: float) -> None:
+        """Decide on the number of workers; hold the lock."""
+        latency = 0.0
+        if self._latencies:
+            latency = sum(self._latencies) / len(self._latencies)
+            self._latencies.clear()
+            # the best latency slowly drifts up, to follow changes of workload
+            self._best_latency = min(self._best_latency * 1.01, latency)
+        self._stats.latency = latency
+        self._stats.cpu = cpu
+        now = time.monotonic()
+        if now - self._last_change < self.cooldown:
+            return
+        slower = latency > self._best_latency * self.latency_ratio
+        workers = self._workers
+        if self._queue and cpu < self.cpu_high and not slower:
+            workers = min(self.max_workers, workers + max(1, workers // 2))
+        elif not self._queue and self._running < workers:
+            workers = max(
+                self.min_workers, self._running, workers - max(1, workers // 4)
+            )
+        elif cpu >= self.cpu_high and slower:
+            workers = max(self.min_workers, workers - max(1, workers // 4))
+        if workers == self._workers:
+            return
+        if workers > self._workers:
+            self._stats.scale_ups += 1
+        else:
+            self._stats.scale_downs += 1
+        logger.debug(
+            f"{self.kind} workers {self._workers} -> {workers}"
+            f" | queued {len(self._queue)} | cpu {cpu:.0%} | latency {latency:.4f}s"
+        )
+        self._workers = workers
+        self._stats.workers = workers
+        self._stats.peak_workers = max(self._stats.peak_workers, workers)
+        self._last_change = now
+        self._dispatch()
+
+    def stats(self) -> AutoscaleStats:
+        """Return a snapshot of the counters."""
+        with self._lock:
+            return AutoscaleStats(
+                workers=self._workers,
+                peak_workers=self._stats.peak_workers,
+                queued=len(self._queue),
+                running=self._running,
+                completed=self._stats.completed,
+                scale_ups=self._stats.scale_ups,
+                scale_downs=self._stats.scale_downs,
+                latency=self._stats.latency,
+                cpu=self._stats.cpu,
+            )
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        with self._lock:
+            self._closing = True
+            if cancel_futures:
+                while self._queue:
+                    self._queue.popleft()[0].cancel()
+            if wait:
+                # queued calls are started as running ones finish
+                self._drained.wait_for(lambda: not self._queue and not self._running)
+            if self._closed or self._queue or self._running:
+                return  # the last call to finish closes the pools
+            self._closed = True
+        self._close(wait)
+
+    def _close(self, wait: bool) -> None:
+        """Stop the control thread and shut down the pools."""
+        self._stop.set()
+        self._shutdown_pool(wait)
+
+
+class AutoscalingThreadPoolExecutor(AutoscalingExecutor, ThreadPoolExecutor):
+    """Autoscaling pool of threads, for blocking IO or code releasing the GIL.
+
+    It is a ThreadPoolExecutor so that it can be installed with
+    `loop.set_default_executor`, which `asyncio.to_thread` and
+    `run_in_executor(None, ...)` use. See `AutoscalingExecutor`.
+
+    Args:
+        min_workers: Lower bound of the number of threads.
+        max_workers: Upper bound (8 per CPU if None).
+        **kwargs: The control parameters of `AutoscalingExecutor`.
+    """
+
+    kind = "thread"
+
+    def __init__(
+        self, min_workers: int = 1, max_workers: int | None = None, **kwargs: Any
+    ) -> None:
+        if max_workers is None:
+            max_workers = (os.cpu_count() or 1) * 8
+        ThreadPoolExecutor.__init__(
+            self, max_workers=max_workers, thread_name_prefix="autoscale"
+        )
+        AutoscalingExecutor.__init__(self, min_workers, max_workers, **kwargs)
+
+    def _submit_to_pool(
+        self, fn: Callable[..., Any], args: tuple, kwargs: dict
+    ) -> Future:
+        return ThreadPoolExecutor.submit(self, fn, *args, **kwargs)
+
+    def _shutdown_pool(self, wait: bool) -> None:
+        ThreadPoolExecutor.shutdown(self, wait=wait)
+
+
+class AutoscalingProcessPoolExecutor(AutoscalingExecutor):
+    """Autoscaling pool of processes, for CPU-bound work.
+
+    It is not a ThreadPoolExecutor, so it cannot become the default executor of a
+    loop: `asyncio.to_thread` sends calls wrapped in a `contextvars.Context`,
+    which cannot be pickled. Pass it to `run_in_executor` instead. Prefer the
+    "forkserver" or "spawn" context so processes are not all forked upfront. See
+    `AutoscalingExecutor`.
+
+    Args:
+        min_workers: Lower bound of the number of processes.
+        max_workers: Upper bound (1 per CPU if None).
+        mp_context: multiprocessing context of the process pool.
+        **kwargs: The control parameters of `AutoscalingExecutor`.
+    """
+
+    kind = "process"
+
+    def __init__(
+        self,
+        min_workers: int = 1,
+        max_workers: int | None = None,
+        mp_context: BaseContext | None = None,
+        **kwargs: Any,
+    ) -> None:
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        self._processes = ProcessPoolExecutor(max_workers, mp_context=mp_context)
+        super().__init__(min_workers, max_workers, **kwargs)
+
+    def _submit_to_pool(
+        self, fn: Callable[..., Any], args: tuple, kwargs: dict
+    ) -> Future:
+        return self._processes.submit(fn, *args, **kwargs)
+
+    def _shutdown_pool(self, wait: bool) -> None:
+        self._processes.shutdown(wait=wait)
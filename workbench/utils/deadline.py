@@ -0,0 +1,161 @@
+import asyncio
+import contextvars
+import time
+from collections.abc import AsyncIterator, Coroutine
+from contextlib import asynccontextmanager
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+# absolute deadline in event loop time, inherited by tasks created under it
+_deadline: contextvars.ContextVar[float | None] = contextvars.ContextVar(
+    "deadline", default=None
+)
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when the deadline of the current context has passed."""
+
+
+def _now() -> float:
+    try:
+        return asyncio.get_running_loop().time()
+    except RuntimeError:
+        return time.monotonic()
+
+
+class Deadline:
+    """Context manager setting the deadline of the current context.
+
+    See `deadline`.
+    """
+
+    def __init__(self, seconds: float) -> None:
+        self.seconds = seconds
+        self.when = 0.0
+        self._token: contextvars.Token[float | None] | None = None
+        self._timeout: asyncio.Timeout | None = None
+
+    def __enter__(self) -> "Deadline":
+        self.when = _now() + self.seconds
+        current = _deadline.get()
+        if current is not None:
+            self.when = min(self.when, current)  # a nested deadline never extends
+        self._token = _deadline.set(self.when)
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        if self._token is not None:
+            _deadline.reset(self._token)
+            self._token = None
+
+    async def __aenter__(self) -> "Deadline":
+        self.__enter__()
+        self._timeout = asyncio.timeout_at(self.when)
+        await self._timeout.__aenter__()
+        return self
+
+    async def __aexit__(self, et, exc, tb) -> None:
+        try:
+            assert self._timeout is not None
+            await self._timeout.__aexit__(et, exc, tb)
+        except TimeoutError:
+            raise DeadlineExceeded(f"Deadline of {self.seconds}s exceeded") from None
+        finally:
+            self.__exit__()
+
+
+def deadline(seconds: float) -> Deadline:
+    """Set a deadline that nested calls consult to bound their own timeouts.
+
+    `with deadline(s):` only records the deadline in a context variable, which is
+    inherited by tasks created inside the block. Helpers such as `delay` and
+    `HttpClient` shrink their timeouts to it and fail fast with `DeadlineExceeded`
+    once it has passed, so work nobody waits for any more is shed early. `async
+    with deadline(s):` also cancels the block itself at the deadline, like
+    `asyncio.timeout`. Nested deadlines can only make the deadline earlier.
+
+    Args:
+        seconds: The time budget from now.
+    """
+    return Deadline(seconds)
+
+
+def remaining() -> float | None:
+    """Return the seconds left before the deadline, or None without a deadline."""
+    when = _deadline.get()
+    return None if when is None else when - _now()
+
+
+def timeout_for(timeout: float | None = None) -> float | None:
+    """Return `timeout` shrunk to the time left before the deadline."""
+    left = remaining()
+    if left is None:
+        return timeout
+    return max(0.0, left if timeout is None else min(timeout, left))
+
+
+def check_deadline() -> None:
+    """Raise DeadlineExceeded if the deadline has passed."""
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded("Deadline exceeded")
+
+
+@asynccontextmanager
+async def within_deadline(timeout: float | None = None) -> AsyncIterator[None]:
+    """Bound a block by `timeout` and by the deadline, whichever comes first.
+
+    This is the building block of deadline-aware I/O helpers. The block is not
+    entered at all once the deadline has passed.
+
+    Raises:
+        DeadlineExceeded: If the deadline cut the block short.
+        TimeoutError: If `timeout` did.
+    """
+    check_deadline()
+    dl = _deadline.get()
+    when = None if timeout is None else _now() + timeout
+    if dl is not None and (when is None or dl <= when):
+        when, by_deadline = dl, True
+    else:
+        by_deadline = False
+    cm = asyncio.timeout_at(when)
+    try:
+        async with cm:
+            yield
+    except TimeoutError:
+        if cm.expired() and by_deadline:
+            raise DeadlineExceeded("Deadline exceeded") from None
+        raise
+
+
+async def _run_cleanup(coro: Coroutine[Any, Any, T], grace: float | None) -> T:
+    async with asyncio.timeout(grace):
+        return await coro
+
+
+async def shielded(coro: Coroutine[Any, Any, T], grace: float | None = None) -> T:
+    """Run cleanup that must complete even after the deadline or a cancellation.
+
+    The coroutine runs in its own task with no deadline, so deadline-aware helpers
+    inside it do not fail, and it is shielded from the caller's cancellation, like
+    `asyncio.shield`. Unlike `asyncio.shield`, a cancelled caller waits for the
+    cleanup to end before the cancellation propagates, and `grace` bounds how long
+    that can take.
+
+    Args:
+        coro: The cleanup coroutine, e.g. releasing a lock or closing a connection.
+        grace: Max seconds the cleanup may take (unbounded if None).
+
+    Returns:
+        The result of the coroutine.
+    """
+    context = contextvars.copy_context()
+    context.run(_deadline.set, None)
+    task = asyncio.create_task(_run_cleanup(coro, grace), context=context)
+    try:
+        return await asyncio.shield(task)
+    except asyncio.CancelledError:
+        await asyncio.wait({task})
+        raise
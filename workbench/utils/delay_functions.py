@@ -2,9 +2,16 @@ import asyncio
 
 from loguru import logger
 
+from .deadline import remaining, within_deadline
+
 
 async def delay(delay_seconds: int) -> int:
     logger.info(f"sleeping for {delay_seconds} second(s)")
-    await asyncio.sleep(delay_seconds)
+    if remaining() is None:
+        await asyncio.sleep(delay_seconds)
+    else:
+        # stop early with DeadlineExceeded if the caller's deadline comes first
+        async with within_deadline():
+            await asyncio.sleep(delay_seconds)
     logger.info(f"finished sleeping for {delay_seconds} second(s)")
     return delay_seconds
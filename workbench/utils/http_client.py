@@ -0,0 +1,322 @@
+import asyncio
+import socket
+import ssl
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+from .deadline import within_deadline
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+Key = tuple[str, str, int]  # (scheme, host, port)
+
+
+class ProtocolError(ValueError):
+    """The server sent a malformed HTTP response."""
+
+
+@dataclass
+class Response:
+    """A buffered HTTP response.
+
+    Attributes:
+        url: The requested URL.
+        status: The status code.
+        headers: The headers, with lower-case names. The values of a repeated
+            header are joined with ", ", as by `http.client`.
+        body: The decoded (de-chunked) body.
+    """
+
+    url: str
+    status: int
+    headers: dict[str, str] = field(default_factory=dict)
+    body: bytes = b""
+
+    @property
+    def status_code(self) -> int:
+        """Alias of `status`, as in `requests`."""
+        return self.status
+
+
+@dataclass
+class _Connection:
+    reader: asyncio.StreamReader
+    writer: asyncio.StreamWriter
+    last_used: float = 0.0
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+class HttpClient:
+    """Minimal HTTP/1.1 client with a keep-alive connection pool.
+
+    Connections are kept open after a response and reused by the next request to
+    the same (scheme, host, port), so thousands of requests to a few hosts open only
+    a few sockets. Open connections are bounded per host and requests in flight are
+    bounded overall, so `fetch_all` can be handed any number of URLs. Host names are
+    resolved once per `dns_ttl`, and concurrent lookups of a host share one call.
+
+    Args:
+        limit: Max number of requests in flight.
+        limit_per_host: Max number of connections to one host.
+        timeout: Default timeout of a whole request in seconds, including waiting
+            for a connection. It is shrunk to the current `deadline`, if any.
+        dns_ttl: Seconds to cache a resolved host.
+        keepalive_timeout: Seconds an idle connection is kept.
+    """
+
+    def __init__(
+        self,
+        limit: int = 100,
+        limit_per_host: int = 10,
+        timeout: float = 10.0,
+        dns_ttl: float = 300.0,
+        keepalive_timeout: float = 15.0,
+    ) -> None:
+        self.limit_per_host = limit_per_host
+        self.timeout = timeout
+        self.dns_ttl = dns_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.connections_opened = 0
+        self.dns_lookups = 0
+        self._limit = asyncio.Semaphore(limit)
+        self._host_limits: dict[Key, asyncio.Semaphore] = {}
+        self._idle: dict[Key, list[_Connection]] = {}
+        self._dns: dict[tuple[str, int], tuple[float, asyncio.Future[list[str]]]] = {}
+        self._ssl = ssl.create_default_context()
+
+    async def __aenter__(self) -> "HttpClient":
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.close()
+
+    async def get(self, url: str, timeout: float | None = None) -> Response:
+        """Send a GET request.
+
+        Args:
+            url: An http or https URL.
+            timeout: Timeout of the request in seconds (the client default if None).
+
+        Returns:
+            The response.
+        """
+        return await self.request("GET", url, timeout=timeout)
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        headers: dict[str, str] | None = None,
+        body: bytes = b"",
+        timeout: float | None = None,
+    ) -> Response:
+        """Send a request on a pooled connection.
+
+        Args:
+            method: The HTTP method.
+            url: An http or https URL.
+            headers: Extra request headers.
+            body: The request body.
+            timeout: Timeout of the request in seconds (the client default if None).
+
+        Returns:
+            The response.
+        """
+        parts = urlsplit(url)
+        if parts.scheme not in DEFAULT_PORTS or not parts.hostname:
+            raise ValueError(f"Unsupported URL: {url}")
+        key = (parts.scheme, parts.hostname, parts.port or DEFAULT_PORTS[parts.scheme])
+        target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        host = parts.netloc.rsplit("@", 1)[-1]
+        lines = [f"{method} {target} HTTP/1.1", f"Host: {host}"]
+        lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        if body:
+            lines.append(f"Content-Length: {len(body)}")
+        head = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+        async with within_deadline(self.timeout if timeout is None else timeout):
+            async with self._limit, self._host_limit(key):
+                for attempt in range(2):
+                    conn, reused = await self._acquire(key)
+                    try:
+                        conn.writer.write(head + body)
+                        await conn.writer.drain()
+                        response, keep_alive = await self._read_response(
+                            conn.reader, url, method
+                        )
+                    except (ConnectionError, asyncio.IncompleteReadError):
+                        conn.close()
+                        # the server may have closed an idle connection: retry once
+                        if reused and attempt == 0:
+                            continue
+                        raise
+                    except BaseException:
+                        # timeout or cancellation: the stream is in an unknown state
+                        conn.close()
+                        raise
+                    if keep_alive:
+                        self._release(key, conn)
+                    else:
+                        conn.close()
+                    return response
+        raise AssertionError("unreachable")
+
+    async def fetch_all(
+        self, urls: Iterable[str], timeout: float | None = None
+    ) -> list[Response | BaseException]:
+        """GET every URL concurrently, within the client's limits.
+
+        Args:
+            urls: The URLs.
+            timeout: Timeout of each request in seconds (the client default if None).
+
+        Returns:
+            The response or the exception of each URL, in order.
+        """
+        return await asyncio.gather(
+            *[self.get(url, timeout=timeout) for url in urls], return_exceptions=True
+        )
+
+    async def close(self) -> None:
+        """Close every idle connection."""
+        idle = [conn for conns in self._idle.values() for conn in conns]
+        self._idle.clear()
+        for conn in idle:
+            conn.close()
+        for conn in idle:
+            try:
+                await conn.writer.wait_closed()
+            except (ConnectionError, ssl.SSLError):
+                pass
+
+    def _host_limit(self, key: Key) -> asyncio.Semaphore:
+        limit = self._host_limits.get(key)
+        if limit is None:
+            limit = self._host_limits[key] = asyncio.Semaphore(self.limit_per_host)
+        return limit
+
+    async def _acquire(self, key: Key) -> tuple[_Connection, bool]:
+        """Return an idle connection to `key` or open a new one."""
+        idle = self._idle.get(key, [])
+        now = time.monotonic()
+        while idle:
+            conn = idle.pop()
+            if (
+                now - conn.last_used < self.keepalive_timeout
+                and not conn.writer.is_closing()
+                and not conn.reader.at_eof()
+            ):
+                return conn, True
+            conn.close()
+        scheme, host, port = key
+        addresses = await self._resolve(host, port)
+        error: OSError | None = None
+        # try each address in turn, e.g. IPv4 when IPv6 is unreachable
+        for address in addresses:
+            try:
+                reader, writer = await asyncio.open_connection(
+                    address,
+                    port,
+                    ssl=self._ssl if scheme == "https" else None,
+                    server_hostname=host if scheme == "https" else None,
+                )
+            except OSError as e:
+                error = e
+                continue
+            self.connections_opened += 1
+            return _Connection(reader, writer), False
+        raise error or OSError(f"No address found for {host}")
+
+    def _release(self, key: Key, conn: _Connection) -> None:
+        conn.last_used = time.monotonic()
+        self._idle.setdefault(key, []).append(conn)
+
+    async def _resolve(self, host: str, port: int) -> list[str]:
+        """Resolve a host to IP addresses through the cache."""
+        now = time.monotonic()
+        cached = self._dns.get((host, port))
+        if (
+            cached is None
+            or cached[0] < now
+            or (cached[1].done() and cached[1].exception() is not None)
+        ):
+            self.dns_lookups += 1
+            lookup: asyncio.Future[list[str]] = asyncio.ensure_future(
+                self._getaddrinfo(host, port)
+            )
+            self._dns[(host, port)] = (now + self.dns_ttl, lookup)
+        else:
+            lookup = cached[1]
+        # shield: a cancelled request must not cancel a lookup others are awaiting
+        return await asyncio.shield(lookup)
+
+    async def _getaddrinfo(self, host: str, port: int) -> list[str]:
+        infos = await asyncio.get_running_loop().getaddrinfo(
+            host, port, type=socket.SOCK_STREAM
+        )
+        return [str(info[4][0]) for info in infos]
+
+    @staticmethod
+    async def _read_head(
+        reader: asyncio.StreamReader,
+    ) -> tuple[str, int, dict[str, str]]:
+        """Read a status line and headers, and return (version, status, headers)."""
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("Connection closed before the response")
+        try:
+            version, status, *_ = status_line.decode("latin-1").split(" ", 2)
+            code = int(status)
+        except ValueError:
+            raise ProtocolError(f"Invalid status line: {status_line!r}") from None
+        headers: dict[str, str] = {}
+        while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            name, value = name.strip().lower(), value.strip()
+            headers[name] = f"{headers[name]}, {value}" if name in headers else value
+        return version, code, headers
+
+    @classmethod
+    async def _read_response(
+        cls, reader: asyncio.StreamReader, url: str, method: str
+    ) -> tuple[Response, bool]:
+        """Read one response and tell whether the connection can be reused."""
+        version, code, headers = await cls._read_head(reader)
+        # skip interim responses such as 100 Continue: the final one follows
+        while 100 <= code < 200 and code != 101:
+            version, code, headers = await cls._read_head(reader)
+
+        keep_alive = (
+            version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+        )
+        if method == "HEAD" or code in (101, 204, 304):
+            body = b""
+        elif headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while size := _parse_int((await reader.readline()).split(b";")[0], 16):
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)  # CRLF after the chunk
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass  # trailers
+            body = b"".join(chunks)
+        elif "content-length" in headers:
+            body = await reader.readexactly(_parse_int(headers["content-length"]))
+        else:
+            body = await reader.read()  # delimited by the end of the connection
+            keep_alive = False
+        return Response(url, code, headers, body), keep_alive
+
+
+def _parse_int(value: bytes | str, base: int = 10) -> int:
+    """Parse a chunk size or a Content-Length, raising `ProtocolError`."""
+    try:
+        size = int(value, base)
+    except ValueError:
+        raise ProtocolError(f"Invalid size: {value!r}") from None
+    if size < 0:
+        raise ProtocolError(f"Invalid size: {value!r}")
+    return size
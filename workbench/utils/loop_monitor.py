@@ -0,0 +1,151 @@
+import asyncio
+import heapq
+import sys
+import threading
+import time
+import traceback
+from dataclasses import dataclass, field
+
+from async_timer import Histogram
+from loguru import logger
+
+
+@dataclass(order=True)
+class Stall:
+    """A period during which the event loop did not run the heartbeat.
+
+    Attributes:
+        duration: How long the loop was blocked, in seconds.
+        task: Name of the task that was running when the stall was detected.
+        coro: Qualified name of that task's coroutine.
+        stack: Stack of the event loop thread when the stall was detected.
+    """
+
+    duration: float
+    task: str = field(compare=False, default="")
+    coro: str = field(compare=False, default="")
+    stack: str = field(compare=False, default="")
+
+
+class LoopMonitor:
+    """Lightweight event loop lag monitor for production use.
+
+    A heartbeat task sleeps for `interval` and records how late it wakes up into a
+    histogram. A watchdog thread notices when the heartbeat is overdue by more than
+    `slow_threshold`, and snapshots the running task and the stack of the event
+    loop thread, which points at the blocking call (e.g. a `requests.get` inside a
+    coroutine). Unlike `asyncio.run(..., debug=True)`, nothing is added to each
+    callback.
+
+    Args:
+        interval: Heartbeat interval in seconds.
+        slow_threshold: Lag in seconds above which a stall is reported.
+        max_stalls: Number of slowest stalls to keep.
+    """
+
+    def __init__(
+        self, interval: float = 0.05, slow_threshold: float = 0.1, max_stalls: int = 10
+    ) -> None:
+        self.interval = interval
+        self.slow_threshold = slow_threshold
+        self.max_stalls = max_stalls
+        self.lag = Histogram()
+        self._stalls: list[Stall] = []  # min-heap of the slowest stalls
+        self._pending: Stall | None = None
+        self._lock = threading.Lock()
+        self._last_beat = 0.0
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread_id = 0
+        self._heartbeat: asyncio.Task | None = None
+        self._stop = threading.Event()
+        self._watchdog: threading.Thread | None = None
+
+    async def __aenter__(self) -> "LoopMonitor":
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.stop()
+
+    def start(self) -> None:
+        """Start the heartbeat task and the watchdog thread on the running loop."""
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.perf_counter()
+        self._stop.clear()
+        self._heartbeat = asyncio.create_task(self._beat(), name="loop-monitor")
+        self._watchdog = threading.Thread(
+            target=self._watch, name="loop-monitor-watchdog", daemon=True
+        )
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        """Stop the heartbeat task and the watchdog thread."""
+        self._stop.set()
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            try:
+                await self._heartbeat
+            except asyncio.CancelledError:
+                pass
+        if self._watchdog is not None:
+            await asyncio.to_thread(self._watchdog.join)
+
+    @property
+    def stalls(self) -> list[Stall]:
+        """Return the slowest stalls, slowest first."""
+        with self._lock:
+            return sorted(self._stalls, reverse=True)
+
+    def summary(self) -> dict[str, float]:
+        """Return lag percentiles in seconds and the number of heartbeats."""
+        return self.lag.summary()
+
+    def dump(self) -> None:
+        """Log the lag percentiles and the slowest stalls."""
+        s = self.summary()
+        logger.info(
+            f"loop lag | beats {s['count']} | p50 {s['p50']:.6f}s"
+            f" | p95 {s['p95']:.6f}s | p99 {s['p99']:.6f}s | max {s['max']:.6f}s"
+        )
+        for stall in self.stalls:
+            logger.warning(
+                f"loop blocked {stall.duration:.4f}s by {stall.task} ({stall.coro})\n"
+                f"{stall.stack}"
+            )
+
+    async def _beat(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            lag = max(0.0, now - self._last_beat - self.interval)
+            self._last_beat = now
+            self.lag.record(int(lag * 1e9))
+            with self._lock:
+                stall, self._pending = self._pending, None
+                if stall is not None:
+                    stall.duration = lag
+                    if len(self._stalls) < self.max_stalls:
+                        heapq.heappush(self._stalls, stall)
+                    else:
+                        heapq.heappushpop(self._stalls, stall)
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.interval):
+            overdue = time.perf_counter() - self._last_beat - self.interval
+            if overdue <= self.slow_threshold:
+                continue
+            with self._lock:
+                if self._pending is not None:
+                    continue  # already captured this stall
+                self._pending = self._snapshot(overdue)
+
+    def _snapshot(self, overdue: float) -> Stall:
+        """Capture what the event loop thread is doing right now."""
+        task = asyncio.current_task(self._loop) if self._loop is not None else None
+        task_name = task.get_name() if task is not None else "<callback>"
+        coro = task.get_coro() if task is not None else None
+        coro_name = getattr(coro, "__qualname__", repr(coro))
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = "".join(traceback.format_stack(frame)) if frame is not None else ""
+        return Stall(duration=overdue, task=task_name, coro=coro_name, stack=stack)
@@ -0,0 +1,75 @@
+import asyncio
+import importlib
+import importlib.util
+import os
+from collections.abc import Callable, Coroutine
+from typing import Any, Literal, TypeVar, get_args
+
+from loguru import logger
+
+T = TypeVar("T")
+
+Backend = Literal["asyncio", "uvloop"]
+
+LOOP_ENV = "ASYNC_LOOP"  # environment variable selecting the default backend
+
+
+def available_backends() -> list[Backend]:
+    """Return the event loop backends that can be used in this environment."""
+    backends: list[Backend] = ["asyncio"]
+    if importlib.util.find_spec("uvloop") is not None:
+        backends.append("uvloop")
+    return backends
+
+
+def resolve_backend(backend: str | None = None) -> Backend:
+    """Return `backend`, or the one set by `ASYNC_LOOP`, falling back to asyncio.
+
+    Raises:
+        ValueError: If the backend is not a known one.
+    """
+    name = backend or os.environ.get(LOOP_ENV) or "asyncio"
+    if name not in get_args(Backend):
+        raise ValueError(f"Invalid event loop backend: {name}")
+    if name not in available_backends():
+        logger.warning(
+            f"{name} is not installed (uv sync --group {name}), falling back to asyncio"
+        )
+        return "asyncio"
+    return name  # type: ignore[return-value]
+
+
+def loop_factory(
+    backend: str | None = None,
+) -> Callable[[], asyncio.AbstractEventLoop] | None:
+    """Return the factory of event loops of `backend` (None for the default)."""
+    if resolve_backend(backend) == "uvloop":
+        # optional dependency, not installed by default
+        uvloop = importlib.import_module("uvloop")
+        return uvloop.new_event_loop
+    return None
+
+
+def run_async(
+    main: Coroutine[Any, Any, T],
+    backend: str | None = None,
+    debug: bool | None = None,
+) -> T:
+    """Run a coroutine like `asyncio.run`, on the selected event loop backend.
+
+    Entry points call this instead of `asyncio.run` so that the backend can be
+    chosen per deployment without touching the code: pass `backend` (e.g. from a
+    `--loop` command line flag) or set `ASYNC_LOOP=uvloop`. uvloop is in the
+    optional `uvloop` dependency group; when it is not installed, a warning is
+    logged and the default asyncio loop is used.
+
+    Args:
+        main: The coroutine to run.
+        backend: "asyncio" or "uvloop" (None for `ASYNC_LOOP`, else asyncio).
+        debug: Run the loop in debug mode (None for the asyncio default).
+
+    Returns:
+        The result of the coroutine.
+    """
+    with asyncio.Runner(debug=debug, loop_factory=loop_factory(backend)) as runner:
+        return runner.run(main)
@@ -0,0 +1,185 @@
+import asyncio
+import atexit
+import functools
+import importlib
+import inspect
+import math
+import os
+import threading
+import types
+from collections.abc import Awaitable, Callable, Iterable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Generic, Literal, ParamSpec, TypeVar
+
+P = ParamSpec("P")  # For function parameters
+R = TypeVar("R")  # For return type
+
+Kind = Literal["process", "thread"]
+
+_executors: dict[Kind, Executor] = {}
+_max_workers: dict[Kind, int | None] = {"process": None, "thread": None}
+_lock = threading.Lock()
+
+
+def configure_offload(
+    process_workers: int | None = None, thread_workers: int | None = None
+) -> None:
+    """Set the size of the shared pools.
+
+    Later calls go to new pools of the new size, created lazily. The pools that
+    already exist finish the calls they were given, then shut down.
+
+    Args:
+        process_workers: Number of processes (None for the ProcessPoolExecutor
+            default, os.cpu_count()).
+        thread_workers: Number of threads (None for the ThreadPoolExecutor default,
+            min(32, os.cpu_count() + 4)).
+    """
+    with _lock:
+        _max_workers["process"] = process_workers
+        _max_workers["thread"] = thread_workers
+        for executor in _executors.values():
+            executor.shutdown(wait=False, cancel_futures=False)
+        _executors.clear()
+
+
+def _pool_size(kind: Kind) -> int:
+    """Return the number of workers of the shared pool of `kind`."""
+    workers = _max_workers[kind]
+    if workers is not None:
+        return workers
+    cpus = os.cpu_count() or 1
+    return cpus if kind == "process" else min(32, cpus + 4)
+
+
+def get_executor(kind: Kind) -> Executor:
+    """Return the process-wide shared executor of `kind`, creating it on first use."""
+    executor = _executors.get(kind)
+    if executor is not None:
+        return executor
+    with _lock:
+        executor = _executors.get(kind)
+        if executor is None:
+            if kind == "process":
+                executor = ProcessPoolExecutor(max_workers=_max_workers[kind])
+            elif kind == "thread":
+                executor = ThreadPoolExecutor(
+                    max_workers=_max_workers[kind], thread_name_prefix="offload"
+                )
+            else:
+                raise ValueError(f"Invalid kind: {kind}")
+            _executors[kind] = executor
+    return executor
+
+
+@atexit.register
+def _shutdown() -> None:
+    for executor in _executors.values():
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _resolve(module: str, qualname: str) -> Callable[..., Any]:
+    """Find the undecorated function in a worker process."""
+    obj: Any = importlib.import_module(module)
+    for attr in qualname.split("."):
+        obj = getattr(obj, attr)
+    return getattr(obj, "__offloaded__", obj)
+
+
+def _call(func: Callable[..., Any], args: tuple, kwargs: dict[str, Any]) -> Any:
+    if inspect.iscoroutinefunction(func):
+        return asyncio.run(func(*args, **kwargs))
+    return func(*args, **kwargs)
+
+
+def _run(module: str, qualname: str, args: tuple, kwargs: dict[str, Any]) -> Any:
+    return _call(_resolve(module, qualname), args, kwargs)
+
+
+def _call_chunk(func: Callable[..., Any], chunk: list[Any]) -> list[Any]:
+    return [_call(func, (item,), {}) for item in chunk]
+
+
+def _run_chunk(module: str, qualname: str, chunk: list[Any]) -> list[Any]:
+    return _call_chunk(_resolve(module, qualname), chunk)
+
+
+class Offloaded(Generic[P, R]):
+    """A function whose calls run in a shared executor and are awaited."""
+
+    def __init__(self, func: Callable[P, R] | Callable[P, Awaitable[R]], kind: Kind):
+        functools.update_wrapper(self, func)
+        self.__offloaded__ = func
+        self.kind = kind
+        # Process workers import the function by name instead of pickling it
+        self._module = func.__module__
+        self._qualname = func.__qualname__
+
+    def __get__(self, instance: Any, owner: type | None = None) -> Any:
+        """Bind to `instance` when decorating a method, like a plain function."""
+        if instance is None:
+            return self
+        return types.MethodType(self, instance)
+
+    async def __call__(self, *args: P.args, **kwargs: P.kwargs) -> R:
+        loop = asyncio.get_running_loop()
+        executor = get_executor(self.kind)
+        if self.kind == "thread":
+            call = functools.partial(_call, self.__offloaded__, args, kwargs)
+        else:
+            call = functools.partial(_run, self._module, self._qualname, args, kwargs)
+        # Cancelling the await cancels the call if it has not started yet
+        return await loop.run_in_executor(executor, call)
+
+    async def map(self, items: Iterable[Any], chunksize: int | None = None) -> list[R]:
+        """Call the function on each item, sending items to the pool in chunks.
+
+        Args:
+            items: The single argument of each call.
+            chunksize: Items per chunk. About 4 chunks per worker if None.
+
+        Returns:
+            The results in the order of `items`.
+        """
+        items = list(items)
+        if not items:
+            return []
+        if chunksize is None:
+            chunksize = math.ceil(len(items) / (4 * _pool_size(self.kind)))
+        loop = asyncio.get_running_loop()
+        executor = get_executor(self.kind)
+        if self.kind == "thread":
+            run_chunk = functools.partial(_call_chunk, self.__offloaded__)
+        else:
+            run_chunk = functools.partial(_run_chunk, self._module, self._qualname)
+        call_coros = [
+            loop.run_in_executor(executor, run_chunk, items[i : i + chunksize])
+            for i in range(0, len(items), chunksize)
+        ]
+        # If the caller is cancelled, gather cancels the chunks not yet started
+        chunks = await asyncio.gather(*call_coros)
+        return [result for chunk in chunks for result in chunk]
+
+
+def offload(kind: Kind = "process"):
+    """Decorator to run a CPU-bound function or coroutine in a shared pool.
+
+    The decorated function is awaited like a coroutine while its body runs in a
+    lazily created, process-wide executor (see `configure_offload`), so many tasks
+    can call it concurrently without each creating its own pool. Coroutines are
+    driven by `asyncio.run` in the worker. With kind="process" the function must be
+    importable by its module and qualified name, like any pickled function, and so
+    must the instance of a decorated method; with kind="thread" any callable works.
+    `map` is called on the function, not on a bound method.
+
+    Args:
+        kind: "process" for CPU-bound work, "thread" for blocking IO or code that
+            releases the GIL.
+    """
+
+    def wrapper(
+        func: Callable[P, R] | Callable[P, Awaitable[R]],
+    ) -> Offloaded[P, R]:
+        return Offloaded(func, kind)
+
+    return wrapper
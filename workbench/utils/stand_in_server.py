@@ -0,0 +1,75 @@
+import asyncio
+import contextlib
+import random
+from collections.abc import AsyncIterator
+
+
+class StandInServer:
+    """Local HTTP/1.1 server for tests and benchmarks of `HttpClient`.
+
+    Every request is answered after an injected latency, according to its path:
+
+    - `/chunked`: a chunked body of "hello, world".
+    - `/cut`: announces 100 bytes, sends 5 and closes the connection.
+    - `/continue`: an interim `100 Continue`, then the path as body.
+    - `/cookies`: two `Set-Cookie` headers and no body.
+    - `/bad-chunk`: a chunked body whose first size line is empty.
+    - anything else: the path as body, with Content-Length.
+
+    Args:
+        latency: Mean response latency in seconds (uniform in [0.5x, 1.5x]).
+    """
+
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.connections = 0
+        self.requests = 0
+
+    @contextlib.asynccontextmanager
+    async def serve(self, host: str = "127.0.0.1") -> AsyncIterator[int]:
+        """Listen on a free port of `host` and yield the port."""
+        async with await asyncio.start_server(self.handle, host, 0) as server:
+            yield server.sockets[0].getsockname()[1]
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self.connections += 1
+        try:
+            while request_line := await reader.readline():
+                while (await reader.readline()) not in (b"\r\n", b""):
+                    pass
+                self.requests += 1
+                path = request_line.split(b" ")[1]
+                if self.latency:
+                    await asyncio.sleep(self.latency * random.uniform(0.5, 1.5))
+                if path == b"/chunked":
+                    writer.write(
+                        b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n"
+                        b"5\r\nhello\r\n7;ext=1\r\n, world\r\n0\r\n\r\n"
+                    )
+                elif path == b"/cut":
+                    writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 100\r\n\r\nhello")
+                    await writer.drain()
+                    return
+                elif path == b"/cookies":
+                    writer.write(
+                        b"HTTP/1.1 204 No Content\r\n"
+                        b"Set-Cookie: a=1\r\nSet-Cookie: b=2\r\n\r\n"
+                    )
+                elif path == b"/bad-chunk":
+                    writer.write(
+                        b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n\r\n"
+                    )
+                else:
+                    if path == b"/continue":
+                        writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+                    writer.write(
+                        b"HTTP/1.1 200 OK\r\nContent-Type: text/plain\r\n"
+                        b"Content-Length: %d\r\n\r\n%s" % (len(path), path)
+                    )
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()